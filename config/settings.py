@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware too
+    'ledger.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -89,22 +92,134 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Only require SSL for Postgres; SQLite doesn't support sslmode.
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+#
+# Postgres connections come from psycopg's pool (Django 5.1+), so requests
+# skip connection setup; set DB_POOL=false to fall back to persistent
+# connections. The pool replaces CONN_MAX_AGE, which must then be 0.
+DB_POOL = os.environ.get('DB_POOL', 'true').lower() == 'true'
+
 if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.parse(
             DATABASE_URL,
-            conn_max_age=600,
+            conn_max_age=0 if DB_POOL else 600,
             ssl_require=True,
         )
     }
+    if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Take the write lock when a transaction starts, so two
+                # writers wait on busy_timeout instead of deadlocking on
+                # a read lock upgrade ("database is locked"). Only atomic
+                # blocks begin a transaction, and every one in the app
+                # writes; page reads run in autocommit and, under WAL,
+                # never wait for the write lock.
+                'transaction_mode': 'IMMEDIATE',
+            },
         }
     }
 
+# Applied to every new SQLite connection by ledger.signals. WAL lets
+# readers run alongside the writer, NORMAL sync is durable at checkpoints
+# under WAL, and busy_timeout (ms) makes a writer wait for the lock.
+LEDGER_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Per-user ledger pages are cached (see ledger/caching.py) with keys that
+# are versioned in the database, so every backend stays correct across
+# workers. Pick one that needs no extra services:
+#   locmem - per process (default)
+#   file   - shared by all workers on one host
+#   db     - shared through the database; run `manage.py createcachetable`
+LEDGER_CACHE_BACKEND = os.environ.get('LEDGER_CACHE_BACKEND', 'locmem').strip().lower()
+# Identifies the deployed code in ETags and cache keys, so a release never
+# answers with 304 or a cached payload from the code before it. Set it to
+# the commit or build id; when empty, the newest mtime of the app's Python
+# files and templates stands in for it.
+LEDGER_RELEASE = os.environ.get('LEDGER_RELEASE', '').strip()
+LEDGER_CACHE_TIMEOUT = int(os.environ.get('LEDGER_CACHE_TIMEOUT', '3600'))
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ledgerly',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('LEDGER_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'ledgerly-cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('LEDGER_CACHE_LOCATION', 'ledger_cache'),
+    },
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[LEDGER_CACHE_BACKEND],
+        'TIMEOUT': LEDGER_CACHE_TIMEOUT,
+    },
+}
+
+
+# Request instrumentation
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+
+# ledger.middleware.QueryInstrumentationMiddleware counts and times the
+# SQL of every request. The totals go to the Server-Timing header and to
+# the 'ledger.requests' logger; a view over its query budget logs a
+# warning, or fails outright when strict (as in the ledger's test cases).
+LEDGER_SERVER_TIMING = os.environ.get('LEDGER_SERVER_TIMING', str(DEBUG)).lower() == 'true'
+LEDGER_QUERY_BUDGET_STRICT = os.environ.get('LEDGER_QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+LEDGER_QUERY_BUDGETS = {
+    # Adding the first expense of a day also stores the day and its carry
+    'daily_view_today': {'GET': 15, 'HEAD': 15, 'POST': 40},
+    'daily_view_date': {'GET': 15, 'HEAD': 15, 'POST': 40},
+    'calendar_view_default': 15,
+    'calendar_view': 15,
+    'monthly_summary': 15,
+    'year_summary': 15,
+    'get_day_summary': 10,
+    'get_month_summary': 10,
+    'get_year_summary': 10,
+    'get_spend_range': 8,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ledger.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('LEDGER_REQUEST_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,200 @@
+# ledger/analytics.py
+"""Year-in-review figures computed over array-backed columns.
+
+A year is loaded with one query per source: the day ledgers (date, base
+budget, stored spend) and the monthly category rollups. Values become
+integer cents in array-module columns, and every statistic below is a
+pass over whole columns with builtins (sorted, sum, zip, slicing) rather
+than model instances and Decimal arithmetic per row. Expenses themselves
+are never scanned, so the cost does not grow with their number.
+"""
+from array import array
+from datetime import date, datetime
+
+from django.utils import timezone
+
+from .carryover import CARRYOVER_HORIZON_DAYS, carry_into
+from .models import DailyLedger, MonthlyCategoryRollup, SavingsTransaction
+
+
+STATUSES = ("Underspent", "Balanced", "Overspent")
+UNDERSPENT, BALANCED, OVERSPENT = range(3)
+PERCENTILES = (50, 75, 90, 95)
+
+
+def _cents(values):
+    return array('q', [int(value * 100) for value in values])
+
+
+def _amount(cents):
+    return round(cents / 100, 2)
+
+
+def load_day_columns(user, year, until=None):
+    """Return (ordinals, base, spent) columns for the user's days in a year.
+
+    Days after `until` (stored early, such as by a savings withdrawal
+    into a future day) are left out.
+    """
+    first, next_first = date(year, 1, 1), date(year + 1, 1, 1)
+    rows = DailyLedger.objects.filter(user=user, date__gte=first, date__lt=next_first)
+    if until is not None:
+        rows = rows.filter(date__lte=until)
+    rows = list(rows.order_by('date').values_list('date', 'base_budget', 'expense_total'))
+    if not rows:
+        return array('l'), array('q'), array('q')
+    dates, bases, spent = zip(*rows)
+    return array('l', [day.toordinal() for day in dates]), _cents(bases), _cents(spent)
+
+
+def day_statuses(bases, spent):
+    """Classify each day as DailyLedger.status does, in integer cents."""
+    return array('b', [
+        (OVERSPENT if total > 0 else UNDERSPENT) if base == 0
+        else OVERSPENT if total >= base
+        else BALANCED if 2 * total >= base
+        else UNDERSPENT
+        for base, total in zip(bases, spent)
+    ])
+
+
+def percentile(ordered, pct):
+    """Linear-interpolated percentile of an already sorted column."""
+    if not ordered:
+        return 0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def longest_streaks(ordinals, statuses):
+    """Return, per status, (length, first ordinal, last ordinal) of its longest run.
+
+    A run is broken by another status or by a day without a ledger.
+    """
+    best = [(0, None, None)] * len(STATUSES)
+    run = 0
+    start = previous = previous_status = None
+    for ordinal, status in zip(ordinals, statuses):
+        if status == previous_status and ordinal == previous + 1:
+            run += 1
+        else:
+            run, start = 1, ordinal
+        if run > best[status][0]:
+            best[status] = (run, start, ordinal)
+        previous, previous_status = ordinal, status
+    return best
+
+
+def budget_flow(ordinals, bases, spent, opening=0):
+    """Return per-month (added, spent, carried) columns in cents.
+
+    A day's carry is the unspent budget of the stored day before it, if
+    that is within the carryover horizon (days in between are not stored
+    and pass it on), so whatever its base exceeds that by was added that
+    day (a new budget or a savings withdrawal). The first day's carry is
+    opening, what reaches it from before the year. carried is the unspent
+    budget at the month's last stored day.
+    """
+    remaining = array('q', [max(base - total, 0) for base, total in zip(bases, spent)])
+    carry = array('q', [opening]) + array('q', [
+        left if ordinal - before <= CARRYOVER_HORIZON_DAYS else 0
+        for before, ordinal, left in zip(ordinals, ordinals[1:], remaining)
+    ])
+    months = array('b', [date.fromordinal(ordinal).month - 1 for ordinal in ordinals])
+
+    added, used, carried = array('q', [0] * 12), array('q', [0] * 12), array('q', [0] * 12)
+    for month, base, total, carried_in, left in zip(months, bases, spent, carry[:len(bases)], remaining):
+        added[month] += max(base - carried_in, 0)
+        used[month] += total
+        carried[month] = left
+    return added, used, carried
+
+
+def month_category_columns(user, year):
+    """Return (categories, month_totals) from the year's rollup rows.
+
+    categories is a list of (title, color, per-month cents column),
+    ordered by yearly total.
+    """
+    rows = (
+        MonthlyCategoryRollup.objects
+        .filter(user=user, year=year)
+        .values_list('month', 'category_id', 'category__title', 'category__color', 'total')
+    )
+    columns = {}
+    month_totals = array('q', [0] * 12)
+    for month, category_id, title, color, total in rows:
+        cents = int(total * 100)
+        column = columns.get(category_id)
+        if column is None:
+            column = columns[category_id] = (title or 'Uncategorized', color or '#6B7280', array('q', [0] * 12))
+        column[2][month - 1] += cents
+        month_totals[month - 1] += cents
+    categories = sorted(columns.values(), key=lambda column: -sum(column[2]))
+    return categories, month_totals
+
+
+def savings_at_year_end(user, year):
+    """Return the savings balance after the last journal entry of the year."""
+    next_year = timezone.make_aware(datetime(year + 1, 1, 1))
+    return (
+        SavingsTransaction.objects
+        .filter(account__user=user, created_at__lt=next_year)
+        .order_by('-id')
+        .values_list('balance_after', flat=True)
+        .first()
+    )
+
+
+def build_year_summary(user, year, today):
+    """Compute the year-in-review payload (plain JSON-ready values).
+
+    The day figures (counts, percentiles, status streaks) cover the days
+    the user stored. Days only carried into have no expenses and are left
+    out, so a streak is broken by them as by any day without a ledger.
+    """
+    ordinals, bases, spent = load_day_columns(user, year, until=today)
+    statuses = day_statuses(bases, spent)
+    ordered = sorted(spent)
+    categories, month_totals = month_category_columns(user, year)
+    # One lookup for what the previous year carries into the first day
+    opening = carry_into(user, date.fromordinal(ordinals[0])) if ordinals else None
+    added, used, carried = budget_flow(ordinals, bases, spent, _cents([opening or 0])[0])
+    balance = savings_at_year_end(user, year)
+
+    streaks = longest_streaks(ordinals, statuses)
+    status_summary = {}
+    for code, name in enumerate(STATUSES):
+        length, first, last = streaks[code]
+        status_summary[name] = {
+            'days': statuses.count(code),
+            'longest_streak': length,
+            'streak_start': date.fromordinal(first).isoformat() if first else None,
+            'streak_end': date.fromordinal(last).isoformat() if last else None,
+        }
+
+    days = len(ordered)
+    return {
+        'year': year,
+        'total': _amount(sum(month_totals)),
+        'month_totals': [_amount(cents) for cents in month_totals],
+        'categories': [
+            {'title': title, 'color': color, 'total': _amount(sum(column)), 'months': [_amount(cents) for cents in column]}
+            for title, color, column in categories
+        ],
+        'days': {
+            'recorded': days,
+            'with_spend': days - ordered.count(0) if days else 0,
+            'average': _amount(sum(ordered) / days) if days else 0,
+            'max': _amount(ordered[-1]) if days else 0,
+            'percentiles': {f'p{pct}': _amount(percentile(ordered, pct)) for pct in PERCENTILES},
+        },
+        'statuses': status_summary,
+        'flow': [
+            {'month': index + 1, 'added': _amount(added[index]), 'spent': _amount(used[index]), 'carried': _amount(carried[index])}
+            for index in range(12)
+        ],
+        'savings_balance': float(balance) if balance is not None else 0,
+    }
@@ -0,0 +1,106 @@
+# ledger/caching.py
+"""Per-user cache of computed ledger payloads.
+
+Cache keys carry the user's data generation, a counter stored on
+UserProfile. Every mutation of a user's expenses, budgets, categories or
+savings bumps it inside the same transaction, which makes all payloads
+cached for that user unreachable at once; stale entries simply expire.
+Because the counter lives in the database, any cache backend (including
+per-process local memory) stays correct with several workers. Keys also
+carry the release (see release_token), so new code never reads payloads
+built by the old.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UserProfile
+
+
+def _cache():
+    return caches[getattr(settings, 'LEDGER_CACHE_ALIAS', 'default')]
+
+
+def release_token():
+    """Return LEDGER_RELEASE, or a token for the code on disk when unset."""
+    return getattr(settings, 'LEDGER_RELEASE', '') or _source_release()
+
+
+@lru_cache(maxsize=None)
+def _source_release():
+    # Read once per process; a deploy restarts the workers.
+    base = settings.BASE_DIR
+    newest = 0
+    for directory, pattern in ((base / 'config', '*.py'), (base / 'ledger', '*.py'),
+                               (base / 'ledger' / 'templates', '*.html'), (base / 'theme' / 'templates', '*.html')):
+        for path in directory.rglob(pattern):
+            newest = max(newest, path.stat().st_mtime_ns)
+    return format(newest, 'x')
+
+
+def user_generation(user):
+    """Return the user's current data generation, or None without a profile."""
+    return (
+        UserProfile.objects
+        .filter(user=user)
+        .values_list('data_generation', flat=True)
+        .first()
+    )
+
+
+def _bump(profiles):
+    return profiles.update(data_generation=F('data_generation') + 1, data_changed_at=timezone.now())
+
+
+def bump_user_generation(user_id):
+    """Invalidate every payload cached for one user."""
+    _bump(UserProfile.objects.filter(user_id=user_id))
+
+
+def bump_generation_for_ledger(ledger_id):
+    """Invalidate the payloads of whichever user owns a ledger, in one statement."""
+    _bump(UserProfile.objects.filter(user__daily_ledgers=ledger_id))
+
+
+def user_validators(request):
+    """Return (data_generation, data_changed_at) for the request's user.
+
+    Read once per request; (None, None) when the user has no profile.
+    """
+    validators = getattr(request, '_ledger_validators', None)
+    if validators is None:
+        validators = (
+            UserProfile.objects
+            .filter(user=request.user)
+            .values_list('data_generation', 'data_changed_at')
+            .first()
+        ) or (None, None)
+        request._ledger_validators = validators
+    return validators
+
+
+def cached_user_payload(user, name, parts, builder, timeout=None, generation=None):
+    """Return builder() for this user, cached until their data changes.
+
+    name identifies the payload kind and parts its arguments (such as a
+    date or a year and month). Users without a profile are not cached.
+    A read-only view that already has the generation from
+    user_validators() can pass it to save the lookup.
+    """
+    if generation is None:
+        generation = user_generation(user)
+    if generation is None:
+        return builder()
+
+    key = ':'.join(['ledger', release_token(), str(user.pk), str(generation), name, *(str(part) for part in parts)])
+    cache = _cache()
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        if timeout is None:
+            timeout = getattr(settings, 'LEDGER_CACHE_TIMEOUT', 3600)
+        cache.set(key, value, timeout)
+    return value
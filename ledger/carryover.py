@@ -0,0 +1,276 @@
+# ledger/carryover.py
+"""Carryover of unspent budget from one day to the next.
+
+Only days the user wrote to are stored. A day without a row reads as
+carrying its nearest stored predecessor's remaining, as long as that day
+is within CARRYOVER_HORIZON_DAYS; the remaining passes unchanged through
+the days in between, since they have no expenses. A row is created only
+when something is written to the day (see get_or_create_day), and the
+walks below only ever update stored rows.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .models import DailyLedger
+from .caching import bump_user_generation
+
+
+# How far ahead a single change is allowed to carry.
+CARRYOVER_HORIZON_DAYS = 60
+
+ZERO = Decimal('0.00')
+
+
+def _remaining(base_budget, expense_total):
+    remaining = base_budget - expense_total
+    return remaining if remaining > ZERO else ZERO
+
+
+def _load_window(user, start_date: date, end_date: date):
+    """Load the user's ledgers in [start_date, end_date] keyed by date.
+
+    The stored expense totals come along with each row, so the walk below
+    never has to go back to the database per day.
+    """
+    rows = DailyLedger.objects.filter(user=user, date__gte=start_date, date__lte=end_date)
+    return {row.date: row for row in rows}
+
+
+def _carry_source(user, target_date: date):
+    """Return (date, remaining) of the day carrying into target_date, or None."""
+    latest = (
+        DailyLedger.objects
+        .filter(
+            user=user,
+            date__lt=target_date,
+            date__gte=target_date - timedelta(days=CARRYOVER_HORIZON_DAYS),
+        )
+        .order_by('-date')
+        .values_list('date', 'base_budget', 'expense_total')
+        .first()
+    )
+    if latest is None:
+        return None
+    return latest[0], _remaining(latest[1], latest[2])
+
+
+def carry_into(user, target_date: date):
+    """Return what target_date's base budget is carried from, or None.
+
+    The nearest earlier day within the carryover horizon carries its
+    remaining unchanged through any missing days in between. None when
+    there is no such day.
+    """
+    source = _carry_source(user, target_date)
+    return source[1] if source is not None else None
+
+
+def fill_carried_days(user, ledgers, first: date, last: date):
+    """Add unsaved ledgers for the days in [first, last] that are not stored.
+
+    ledgers maps date to the stored ledgers of the range and is extended
+    in place with a carried day wherever a stored predecessor reaches;
+    other days stay absent. Costs one query for the carry into first.
+    """
+    source = _carry_source(user, first)
+    day = first
+    while day <= last:
+        ledger = ledgers.get(day)
+        if ledger is not None:
+            source = (day, _remaining(ledger.base_budget, ledger.total_expenses))
+        elif source is not None and (day - source[0]).days <= CARRYOVER_HORIZON_DAYS:
+            ledgers[day] = DailyLedger(user=user, date=day, base_budget=source[1])
+        day += timedelta(days=1)
+    return ledgers
+
+
+def get_or_create_day(user, target_date: date):
+    """Return the user's ledger for target_date, creating it with its carry."""
+    ledger = DailyLedger.objects.filter(user=user, date=target_date).first()
+    if ledger is None:
+        carry = carry_into(user, target_date)
+        ledger, _ = DailyLedger.objects.get_or_create(
+            user=user, date=target_date, defaults={'base_budget': carry if carry is not None else ZERO},
+        )
+    return ledger
+
+
+def heal_day(user, ledger):
+    """Bring a stored day without expenses back to its carry.
+
+    A day the user set manually, or one with expenses, keeps its budget.
+    Writes must call this when they leave a day empty (or are about to
+    write to one), since reads no longer correct stored days.
+    """
+    if ledger.is_manual_override or ledger.expense_count:
+        return ledger
+    carry = carry_into(user, ledger.date)
+    if carry is not None and ledger.base_budget != carry:
+        ledger.base_budget = carry
+        # Only the budget: the totals are shifted by the Expense signals
+        ledger.save(update_fields=['base_budget'])
+    return ledger
+
+
+def propagate_carryover(user, start_date: date, preserve_manual_increases: bool = True):
+    """Propagate remaining budget forward to the following stored days.
+
+    When preserve_manual_increases is True, we will only increase future
+    days to match today's remaining (never lower), which preserves manual
+    bumps such as savings withdrawals. When False, we force the next day's
+    base to equal today's remaining (lowering allowed), which is needed
+    after expense edits so future days reflect reduced remaining.
+
+    We stop at a day that already has expenses or that the user set
+    manually, and not before: a zero remaining still has to reach the
+    stored days after it. Days that are not stored need no write,
+    they read their carry. The whole horizon is read in one query, the
+    chain is computed in memory and written back in bulk.
+    """
+    _walk_carryover(user, start_date, preserve_manual_increases)
+
+
+def cascade_carryover(user, start_date: date, cascade_days: int = CARRYOVER_HORIZON_DAYS, new_days=()):
+    """Force exact carryover through every day of the cascade window.
+
+    Used after a budget reset. Within the first cascade_days days, a day
+    with expenses or a manual override only stops that day from being
+    rewritten; the next day is still recomputed from it.
+    Past the window the usual stopping rules apply again. This gives the
+    same result as running propagate_carryover once per day of the
+    window, in a single read and a single bulk write.
+
+    new_days are dates created together with their expenses (a bulk
+    import). They still receive the carry, as they would have had it
+    before their first expense was added one by one.
+    """
+    _walk_carryover(user, start_date, False, cascade_days=cascade_days, new_days=frozenset(new_days))
+
+
+def _walk_carryover(user, start_date: date, preserve_manual_increases: bool, cascade_days: int = 0,
+                    new_days=frozenset()):
+    # The last cascaded day behaves like an ordinary propagation start,
+    # which can still walk a full horizon beyond it.
+    forced_until = start_date + timedelta(days=max(cascade_days - 1, 0))
+    ledgers = _load_window(user, start_date, forced_until + timedelta(days=CARRYOVER_HORIZON_DAYS))
+
+    current = ledgers.get(start_date)
+    if current is None:
+        return
+
+    to_update = []
+    for next_date in sorted(day for day in ledgers if day > start_date):
+        next_ledger = ledgers[next_date]
+        remaining = _remaining(current.base_budget, current.expense_total)
+        forced = next_date <= forced_until
+
+        if next_date > current.date + timedelta(days=1):
+            # Days in between are not stored and read as carrying `remaining`.
+            if (next_date - current.date).days > CARRYOVER_HORIZON_DAYS:
+                # Out of reach of this carry, like the horizon's end
+                if not forced:
+                    break
+                current = next_ledger
+                continue
+
+        # If next day already has expenses, stop propagation at that boundary.
+        # Respect manual override: do not overwrite or pass through beyond a day
+        # that the user explicitly set (e.g., Reset Budget or manual base edits).
+        busy = next_ledger.expense_count and next_date not in new_days
+        if busy or next_ledger.is_manual_override:
+            if not forced:
+                break
+            current = next_ledger
+            continue
+
+        if preserve_manual_increases:
+            # Only raise the next day up to remaining; do not reduce it
+            changed = next_ledger.base_budget < remaining
+        else:
+            # Force exact carryover so subsequent days reflect lowered remaining.
+            changed = next_ledger.base_budget != remaining
+
+        if changed:
+            next_ledger.base_budget = remaining
+            to_update.append(next_ledger)
+
+        # A zero remaining carries on too: nothing reads a stored day back
+        # to its carry later, so every one up to the next stop is set now.
+        current = next_ledger
+
+    if not to_update:
+        return
+
+    with transaction.atomic():
+        DailyLedger.objects.bulk_update(to_update, ['base_budget'])
+        # Bulk writes send no signals, so invalidate cached pages here.
+        bump_user_generation(user.pk)
+
+
+def roll_over(target_date: date, first_user_id: int, last_user_id: int, materialize: bool = False):
+    """Bring target_date's carry up to date for every user in an id range.
+
+    Each user's latest day before target_date, within the carryover
+    horizon, gives the carry. A stored target day that has no expenses
+    and no manual override is corrected to it, and the days after it are
+    re-propagated. With materialize, a missing target day is also stored
+    with the carry; otherwise it is left to be derived on read. Users
+    with no recent day are left alone. Returns (created, updated).
+    """
+    in_range = DailyLedger.objects.filter(user_id__gte=first_user_id, user_id__lte=last_user_id)
+    latest = (
+        DailyLedger.objects
+        .filter(
+            user_id=OuterRef('user_id'),
+            date__lt=target_date,
+            date__gte=target_date - timedelta(days=CARRYOVER_HORIZON_DAYS),
+        )
+        .order_by('-date')
+        .values('date')[:1]
+    )
+    carries = {}
+    for user_id, base, total in (
+        in_range.filter(date=Subquery(latest))
+        .values_list('user_id', 'base_budget', 'expense_total')
+        .iterator(chunk_size=2000)
+    ):
+        carries[user_id] = _remaining(base, total)
+
+    existing = {
+        user_id: (pk, base, count, manual)
+        for user_id, pk, base, count, manual in in_range.filter(date=target_date).values_list(
+            'user_id', 'pk', 'base_budget', 'expense_count', 'is_manual_override',
+        )
+    }
+
+    to_create = []
+    to_update = []
+    for user_id, carry in carries.items():
+        row = existing.get(user_id)
+        if row is None:
+            if materialize:
+                to_create.append(DailyLedger(user_id=user_id, date=target_date, base_budget=carry))
+        else:
+            pk, base, count, manual = row
+            if not count and not manual and base != carry:
+                to_update.append(DailyLedger(pk=pk, user_id=user_id, base_budget=carry))
+
+    if not to_create and not to_update:
+        return 0, 0
+
+    with transaction.atomic():
+        # A concurrent request may have created the same day already.
+        DailyLedger.objects.bulk_create(to_create, batch_size=1000, ignore_conflicts=True)
+        DailyLedger.objects.bulk_update(to_update, ['base_budget'], batch_size=1000)
+        if to_update:
+            # A corrected day may have been carried forward already.
+            for user in get_user_model().objects.filter(pk__in=[row.user_id for row in to_update]):
+                propagate_carryover(user, target_date, preserve_manual_increases=False)
+        # Bulk writes send no signals, so invalidate cached pages here.
+        for user_id in {row.user_id for row in to_create} | {row.user_id for row in to_update}:
+            bump_user_generation(user_id)
+    return len(to_create), len(to_update)
@@ -0,0 +1,92 @@
+# ledger/export.py
+"""Streaming export of a user's whole ledger history.
+
+Rows come from one LEFT JOIN of days and their expenses, read as tuples
+with .iterator(), so days without expenses are included, no model
+instances are built and only one chunk of rows is in memory at a time.
+Output is produced by generators in blocks of a few hundred rows and can
+be gzip-compressed on the fly.
+"""
+import csv
+import json
+import zlib
+
+from .models import DailyLedger
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 2000  # rows fetched per round trip
+BLOCK_ROWS = 500   # rows joined into one yielded block
+
+COLUMNS = (
+    'date', 'base_budget', 'manual_override', 'day_total',
+    'expense_id', 'description', 'category', 'price', 'created_at',
+)
+
+
+def history_rows(user):
+    """Yield one tuple per expense, or per day for days without expenses."""
+    rows = (
+        DailyLedger.objects
+        .filter(user=user)
+        .order_by('date', 'expenses__id')
+        .values_list(
+            'date', 'base_budget', 'is_manual_override', 'expense_total',
+            'expenses__id', 'expenses__description', 'expenses__price',
+            'expenses__category__title', 'expenses__created_at',
+        )
+    )
+    for day, base, manual, total, expense_id, description, price, category, created_at in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield (
+            day.isoformat(), str(base), manual, str(total),
+            expense_id, description, category,
+            str(price) if price is not None else None,
+            created_at.isoformat() if created_at is not None else None,
+        )
+
+
+class _Lines:
+    """File-like sink for csv.writer that hands back what was written."""
+
+    def write(self, value):
+        return value
+
+
+def _blocks(lines):
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= BLOCK_ROWS:
+            yield ''.join(block).encode()
+            block = []
+    if block:
+        yield ''.join(block).encode()
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Lines())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, row)), separators=(',', ':')) + '\n'
+
+
+def gzip_stream(blocks):
+    """Compress a stream of byte blocks into one gzip member as it goes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(user, export_format, compress=False):
+    """Return an iterator of bytes with the user's history in export_format."""
+    lines = csv_lines if export_format == 'csv' else ndjson_lines
+    blocks = _blocks(lines(history_rows(user)))
+    return gzip_stream(blocks) if compress else blocks
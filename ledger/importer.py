@@ -0,0 +1,226 @@
+# ledger/importer.py
+"""Bulk import of expenses from CSV or JSON streams.
+
+Input is parsed record by record and written in batches: categories are
+resolved through a title -> id map loaded once, missing categories and
+days are created with bulk_create, and expenses are inserted with
+bulk_create too. Bulk writes send no signals, so the derived data is
+brought up to date once at the end: the touched days' stored totals, the
+monthly rollups of the touched months, the user's cumulative spend index
+and one carryover pass over the imported date span. The whole import is one transaction.
+
+Columns match the export (date, description, price, category and an
+optional base_budget). A given base_budget is stored as a manual budget
+for that day, so carryover keeps it; rows without a description and
+price, such as the export's empty days, only set the budget.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .caching import bump_user_generation
+from .carryover import cascade_carryover
+from .models import Category, DailyLedger, Expense
+from .rollups import rebuild_rollups
+from .spend_index import rebuild_spend_index
+
+
+IMPORT_FORMATS = ('csv', 'json')
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+READ_SIZE = 64 * 1024
+
+
+@dataclass
+class ImportResult:
+    expenses: int = 0
+    days_created: int = 0
+    categories_created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+
+def csv_records(stream):
+    """Yield (line number, record) from a text stream of CSV with a header row."""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def json_records(stream):
+    """Yield (record number, record) from a JSON array or NDJSON text stream.
+
+    Objects are decoded one at a time from a rolling buffer, so a large
+    array is never loaded whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    number = 0
+    exhausted = False
+    while True:
+        # Skip separators between objects: whitespace, brackets and commas
+        while position < len(buffer) and buffer[position] in ' \t\r\n[],':
+            position += 1
+        if position >= len(buffer) or buffer[position] == '{':
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if exhausted:
+                    if buffer[position:].strip(' \t\r\n[],'):
+                        raise ValueError(f"Malformed JSON after record {number}.")
+                    return
+                chunk = stream.read(READ_SIZE)
+                exhausted = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            number += 1
+            position = end
+            yield number, record
+        else:
+            raise ValueError(f"Expected a JSON object after record {number}.")
+
+
+def _parse(record):
+    """Return (date, description, price, category title, base budget) or raise ValueError."""
+    try:
+        day = date.fromisoformat(str(record.get('date') or '').strip())
+    except ValueError:
+        raise ValueError("date must be YYYY-MM-DD")
+
+    def amount(name):
+        raw = record.get(name)
+        if raw in (None, ''):
+            return None
+        try:
+            value = Decimal(str(raw).strip())
+        except InvalidOperation:
+            raise ValueError(f"{name} is not a number")
+        if not value.is_finite() or value < 0:
+            raise ValueError(f"{name} must be zero or positive")
+        return value.quantize(Decimal('0.01'))
+
+    price = amount('price')
+    base_budget = amount('base_budget')
+    description = str(record.get('description') or '').strip()[:200]
+    if (price is None) != (not description):
+        raise ValueError("description and price go together")
+    category = str(record.get('category') or '').strip()[:100] or None
+    return day, description, price, category, base_budget
+
+
+class _Importer:
+    def __init__(self, user, batch_size):
+        self.user = user
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self.categories = dict(Category.objects.filter(user=user).values_list('title', 'pk'))
+        self.days = dict(DailyLedger.objects.filter(user=user).values_list('date', 'pk'))
+        self.pending = []
+        self.budgets = {}
+        self.touched = set()
+        self.created_days = set()
+
+    def add(self, position, record):
+        try:
+            day, description, price, category, base_budget = _parse(record)
+        except (ValueError, AttributeError) as error:
+            self.result.skipped += 1
+            if len(self.result.errors) < MAX_REPORTED_ERRORS:
+                self.result.errors.append(f"Row {position}: {error}")
+            return
+        self.touched.add(day)
+        if base_budget is not None:
+            self.budgets[day] = base_budget
+        if price is not None:
+            self.pending.append((day, description, price, category))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def _ensure_categories(self, titles):
+        missing = [title for title in titles if title not in self.categories]
+        if not missing:
+            return
+        Category.objects.bulk_create(
+            [Category(user=self.user, title=title) for title in missing], ignore_conflicts=True,
+        )
+        found = dict(Category.objects.filter(user=self.user, title__in=missing).values_list('title', 'pk'))
+        self.result.categories_created += len(found)
+        self.categories.update(found)
+
+    def _ensure_days(self, days):
+        missing = [day for day in days if day not in self.days]
+        if not missing:
+            return
+        DailyLedger.objects.bulk_create(
+            [DailyLedger(user=self.user, date=day) for day in missing], ignore_conflicts=True,
+        )
+        found = dict(DailyLedger.objects.filter(user=self.user, date__in=missing).values_list('date', 'pk'))
+        self.result.days_created += len(found)
+        self.days.update(found)
+        self.created_days.update(found)
+
+    def flush(self):
+        if not self.pending:
+            return
+        self._ensure_categories({category for _day, _description, _price, category in self.pending if category})
+        self._ensure_days({day for day, _description, _price, _category in self.pending})
+        Expense.objects.bulk_create([
+            Expense(
+                daily_ledger_id=self.days[day],
+                category_id=self.categories[category] if category else None,
+                description=description,
+                price=price,
+            )
+            for day, description, price, category in self.pending
+        ], batch_size=self.batch_size)
+        self.result.expenses += len(self.pending)
+        self.pending = []
+
+    def finish(self):
+        self.flush()
+        if not self.touched:
+            return
+        self._ensure_days(sorted(self.touched))
+        if self.budgets:
+            DailyLedger.objects.bulk_update(
+                [
+                    DailyLedger(pk=self.days[day], base_budget=budget, is_manual_override=True)
+                    for day, budget in self.budgets.items()
+                ],
+                ['base_budget', 'is_manual_override'], batch_size=self.batch_size,
+            )
+
+        touched_ids = [self.days[day] for day in self.touched]
+        for start in range(0, len(touched_ids), self.batch_size):
+            DailyLedger.objects.filter(pk__in=touched_ids[start:start + self.batch_size]).recalculate_totals()
+        rebuild_rollups(user_ids=[self.user.pk], months={(day.year, day.month) for day in self.touched})
+        rebuild_spend_index(user_ids=[self.user.pk])
+
+        # One forward pass over the imported span, equivalent to
+        # propagating from every imported day in turn. It starts from the
+        # day before, if there is one, so that day's remaining carries in.
+        first, last = min(self.touched), max(self.touched)
+        if first - timedelta(days=1) in self.days:
+            first -= timedelta(days=1)
+        cascade_carryover(self.user, first, cascade_days=(last - first).days + 1, new_days=self.created_days)
+        bump_user_generation(self.user.pk)
+
+
+def import_expenses(user, records, batch_size=BATCH_SIZE):
+    """Import (position, record) pairs for a user and return an ImportResult.
+
+    Invalid rows are skipped and reported; a malformed stream raises
+    ValueError and nothing is imported.
+    """
+    with transaction.atomic():
+        importer = _Importer(user, batch_size)
+        for position, record in records:
+            importer.add(position, record)
+        importer.finish()
+    return importer.result
@@ -0,0 +1,104 @@
+import random
+from calendar import HTMLCalendar
+from datetime import date
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from django.utils import timezone
+
+from ledger.utils import LedgerHTMLCalendar, _month_skeleton
+
+
+class BaselineLedgerHTMLCalendar(HTMLCalendar):
+    """The previous renderer: reverse() and now() per cell, += assembly."""
+
+    def __init__(self, day_data=None, firstweekday=0):
+        super().__init__(firstweekday)
+        self.day_data = day_data or {}
+
+    def formatday(self, day, weekday):
+        if day == 0:
+            return '<td class="noday">&nbsp;</td>'
+        url = reverse('daily_view_date', args=(self.year, self.month, day))
+        today = timezone.now().date()
+        current_day = date(self.year, self.month, day)
+        css_classes = ["calendar-day-link"]
+        if current_day < today:
+            css_classes.append("past-day")
+        elif current_day == today:
+            css_classes.append("today")
+        spend = ''
+        figures = self.day_data.get(current_day)
+        if figures is not None:
+            total, _base, status = figures
+            css_classes.append(f"status-{status.lower()}")
+            if total:
+                css_classes.append("has-spend")
+                spend = f'<span class="day-spend">₱{total:,.2f}</span>'
+        class_str = " ".join(css_classes)
+        return f'<td><a href="{url}" data-year="{self.year}" data-month="{self.month}" data-day="{day}" class="{class_str}">{day}{spend}</a></td>'
+
+    def formatweek(self, theweek):
+        week = ''.join(self.formatday(d, wd) for (d, wd) in theweek)
+        return f'<tr>{week}</tr>'
+
+    def formatmonth(self, theyear, themonth, withyear=True):
+        self.year, self.month = theyear, themonth
+        cal = f'<table class="ledger-calendar">\n'
+        cal += f'{self.formatmonthname(theyear, themonth, withyear)}\n'
+        cal += f'{self.formatweekheader()}\n'
+        for week in self.monthdays2calendar(theyear, themonth):
+            cal += f'{self.formatweek(week)}\n'
+        cal += '</table>\n'
+        return cal
+
+
+class Command(BaseCommand):
+    help = "Time calendar rendering over a multi-year range against the previous renderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=5, help="Number of years to render.")
+        parser.add_argument('--repeat', type=int, default=5, help="Passes over the whole range.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start_year = timezone.now().year - options['years'] + 1
+        months = [(y, m) for y in range(start_year, start_year + options['years']) for m in range(1, 13)]
+
+        # Synthetic heatmap data so both renderers do the per-cell work
+        statuses = ("Underspent", "Balanced", "Overspent")
+        day_data = {}
+        for year, month in months:
+            for day in range(1, 29):
+                if rng.random() < 0.7:
+                    total = Decimal(rng.randint(0, 50000)) / 100
+                    day_data[date(year, month, day)] = (total, Decimal('300.00'), rng.choice(statuses))
+
+        for year, month in months:
+            expected = BaselineLedgerHTMLCalendar(day_data).formatmonth(year, month)
+            if LedgerHTMLCalendar(day_data).formatmonth(year, month) != expected:
+                self.stderr.write(f"Output differs for {year}-{month:02d}")
+                return
+
+        def run(renderer):
+            began = perf_counter()
+            for _ in range(options['repeat']):
+                for year, month in months:
+                    renderer(day_data).formatmonth(year, month)
+            return perf_counter() - began
+
+        baseline = run(BaselineLedgerHTMLCalendar)
+        _month_skeleton.cache_clear()
+        cold = run(LedgerHTMLCalendar)
+        warm = run(LedgerHTMLCalendar)
+
+        renders = options['repeat'] * len(months)
+        self.stdout.write(f"{renders} month renders over {options['years']} years")
+        for label, elapsed in (("baseline", baseline), ("current (cold cache)", cold), ("current (warm cache)", warm)):
+            self.stdout.write(
+                f"{label:<22} {elapsed * 1000:9.1f} ms  {elapsed / renders * 1e6:8.1f} us/month  "
+                f"x{baseline / elapsed:5.2f}"
+            )
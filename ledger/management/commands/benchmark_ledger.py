@@ -0,0 +1,168 @@
+import json
+import platform
+import statistics
+import subprocess
+from datetime import timedelta
+from time import perf_counter
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ledger.synthetic import SCALES, seed_users
+
+
+class Rollback(Exception):
+    pass
+
+
+def _endpoints(today):
+    """(name, method, url, data) for every request the suite times."""
+    past = today - timedelta(days=30)
+    return [
+        ('daily_view', 'get', reverse('daily_view_today'), None),
+        ('daily_view_past', 'get', reverse('daily_view_date', args=(past.year, past.month, past.day)), None),
+        ('calendar_view', 'get', reverse('calendar_view', args=(today.year, today.month)), None),
+        ('monthly_summary', 'get', reverse('monthly_summary', args=(today.year, today.month)), None),
+        ('get_day_summary', 'get', reverse('get_day_summary'),
+         {'year': past.year, 'month': past.month, 'day': past.day}),
+        ('reset_budget', 'post', reverse('reset_budget', args=(past.year, past.month, past.day)), {}),
+        ('update_savings', 'post', reverse('update_savings'),
+         {'action': 'add', 'amount': '1', 'current_date': today.isoformat()}),
+    ]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time and count the queries of the main pages and actions over "
+        "synthetic users at several sizes, and write the results as JSON "
+        "for comparison between commits. All data is created in a "
+        "transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='small,medium',
+                            help=f"Comma-separated sizes from: {', '.join(SCALES)}.")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per endpoint.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help="Write the JSON results to this file.")
+        parser.add_argument('--compare', help="Earlier results file to print the change against.")
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options['sizes'].split(',') if size.strip()]
+        unknown = [size for size in sizes if size not in SCALES]
+        if unknown:
+            raise CommandError(f"Unknown sizes: {', '.join(unknown)}.")
+        repeat = max(options['repeat'], 1)
+
+        results = {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': timezone.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'seed': options['seed'],
+                'repeat': repeat,
+            },
+            'sizes': {},
+        }
+        for size in sizes:
+            results['sizes'][size] = self.run_size(size, options['seed'], repeat)
+
+        document = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(document + '\n')
+            self.stdout.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(document)
+
+        if options['compare']:
+            with open(options['compare']) as handle:
+                self.compare(json.load(handle), results)
+
+    def run_size(self, size, seed, repeat):
+        scale = SCALES[size]
+        today = timezone.now().date()
+        measured = {}
+        try:
+            with transaction.atomic():
+                began = perf_counter()
+                users, ledgers, expenses = seed_users(
+                    scale['users'], scale['days'], seed, prefix=f"bench-{size}", end=today,
+                )
+                seeded = perf_counter() - began
+                if connection.vendor in ('sqlite', 'postgresql'):
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+                self.stderr.write(f"{size}: {len(users)} users, {ledgers} days, {expenses} expenses")
+
+                client = Client(HTTP_HOST='localhost')
+                client.force_login(users[0])
+                for name, method, url, data in _endpoints(today):
+                    measured[name] = self.measure(client, method, url, data, repeat)
+                raise Rollback
+        except Rollback:
+            pass
+        return {
+            'users': scale['users'],
+            'days_per_user': scale['days'],
+            'ledgers': ledgers,
+            'expenses': expenses,
+            'seed_seconds': round(seeded, 3),
+            'endpoints': measured,
+        }
+
+    def measure(self, client, method, url, data, repeat):
+        """First (cold cache) request, then `repeat` timed ones."""
+        request = getattr(client, method)
+
+        def timed():
+            with CaptureQueriesContext(connection) as queries:
+                began = perf_counter()
+                response = request(url, data)
+                elapsed = perf_counter() - began
+            if response.status_code >= 400:
+                raise CommandError(f"{method.upper()} {url} returned {response.status_code}.")
+            return elapsed, len(queries)
+
+        cold_seconds, cold_queries = timed()
+        runs = [timed() for _ in range(repeat)]
+        times = sorted(seconds for seconds, _queries in runs)
+        return {
+            'cold_ms': round(cold_seconds * 1000, 3),
+            'cold_queries': cold_queries,
+            'median_ms': round(statistics.median(times) * 1000, 3),
+            'p95_ms': round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 3),
+            'queries': max(queries for _seconds, queries in runs),
+        }
+
+    def compare(self, before, after):
+        self.stdout.write(f"\nChange since {before['meta'].get('commit')} (median ms, queries):")
+        for size, current in after['sizes'].items():
+            previous = before['sizes'].get(size)
+            if previous is None:
+                continue
+            for name, figures in current['endpoints'].items():
+                old = previous['endpoints'].get(name)
+                if old is None:
+                    continue
+                ratio = figures['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+                self.stdout.write(
+                    f"{size:<7} {name:<17} {old['median_ms']:9.3f} -> {figures['median_ms']:9.3f}"
+                    f"  x{ratio:5.2f}   {old['queries']:3d} -> {figures['queries']:3d}"
+                )
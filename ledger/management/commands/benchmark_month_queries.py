@@ -0,0 +1,122 @@
+import random
+from datetime import date
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from ledger.models import Expense, MonthlyCategoryRollup
+from ledger.synthetic import generate_history
+from ledger.utils import month_bounds
+
+
+class Rollback(Exception):
+    pass
+
+
+def extract_query(user, year, month):
+    """The previous monthly summary filter (EXTRACT on the month)."""
+    return (
+        Expense.objects
+        .filter(daily_ledger__user=user, daily_ledger__date__year=year, daily_ledger__date__month=month)
+        .values('category__title', 'category__color')
+        .annotate(total=Sum('price'))
+        .order_by('-total')
+    )
+
+
+def range_query(user, year, month):
+    """The current monthly summary filter (half-open date range)."""
+    first, next_first = month_bounds(year, month)
+    return (
+        Expense.objects
+        .filter(daily_ledger__user=user, daily_ledger__date__gte=first, daily_ledger__date__lt=next_first)
+        .values('category__title', 'category__color')
+        .annotate(total=Sum('price'))
+        .order_by('-total')
+    )
+
+
+def rollup_query(user, year, month):
+    """The monthly summary as it reads today (precomputed rollups)."""
+    return (
+        MonthlyCategoryRollup.objects
+        .filter(user=user, year=year, month=month)
+        .values('category__title', 'category__color', 'total')
+        .order_by('-total')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare monthly summary queries over a synthetic user with years of "
+        "history. All data is created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=4)
+        parser.add_argument('--other-users', type=int, default=5, help="Users with one year of noise each.")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        User = get_user_model()
+        today = date.today()
+        start = date(today.year - options['years'], 1, 1)
+
+        user = User.objects.create(username=f"bench-{rng.getrandbits(32):08x}")
+        days = (date(today.year, 1, 1) - start).days
+        ledgers, expenses = generate_history(user, start, days, rng)
+        for index in range(options['other_users']):
+            other = User.objects.create(username=f"bench-noise-{index}-{rng.getrandbits(32):08x}")
+            generate_history(other, start, 365, rng)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(f"Synthetic user: {ledgers} days, {expenses} expenses")
+
+        months = [(year, month) for year in range(start.year, today.year) for month in range(1, 13)]
+
+        def timed(build):
+            # One warm-up pass so every variant runs against a hot page cache
+            for year, month in months:
+                list(build(user, year, month))
+            began = perf_counter()
+            for _ in range(options['repeat']):
+                for year, month in months:
+                    list(build(user, year, month))
+            return (perf_counter() - began) / (options['repeat'] * len(months))
+
+        variants = [
+            ("EXTRACT month filter", extract_query),
+            ("date range filter", range_query),
+            ("monthly rollups", rollup_query),
+        ]
+        for year, month in months:
+            expected = sorted(extract_query(user, year, month), key=str)
+            for label, build in variants[1:]:
+                if sorted(build(user, year, month), key=str) != expected:
+                    self.stderr.write(f"{label}: results differ for {year}-{month:02d}")
+                    return
+
+        results = [(label, timed(build)) for label, build in variants]
+
+        baseline = results[0][1]
+        for label, seconds in results:
+            self.stdout.write(f"{label:<24} {seconds * 1000:8.3f} ms/month  x{baseline / seconds:5.2f}")
+
+        year, month = months[-1]
+        for label, build in variants:
+            self.stdout.write(f"\nPlan ({label}):")
+            self.stdout.write(build(user, year, month).explain())
@@ -0,0 +1,49 @@
+import io
+import sys
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ledger.importer import BATCH_SIZE, IMPORT_FORMATS, csv_records, import_expenses, json_records
+
+
+class Command(BaseCommand):
+    help = "Import expenses for a user from a CSV or JSON file (use - for stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        path = options['path']
+        import_format = options['format'] or (
+            'json' if path.lower().endswith(('.json', '.ndjson', '.jsonl')) else 'csv'
+        )
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            stream = open(path, encoding='utf-8-sig', newline='')
+
+        began = perf_counter()
+        with stream:
+            records = csv_records(stream) if import_format == 'csv' else json_records(stream)
+            try:
+                result = import_expenses(user, records, batch_size=options['batch_size'])
+            except ValueError as error:
+                raise CommandError(f"Import failed, nothing was saved: {error}")
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.expenses} expenses ({result.days_created} new days, "
+            f"{result.categories_created} new categories, {result.skipped} rows skipped) "
+            f"in {perf_counter() - began:.2f}s."
+        ))
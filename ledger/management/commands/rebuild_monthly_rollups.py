@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ledger.caching import bump_user_generation
+from ledger.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly per-category expense rollups from the expense rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild rollups of this username.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Users rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        user_ids = list(users.values_list('pk', flat=True))
+
+        batch_size = options['batch_size']
+        written = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            written += rebuild_rollups(user_ids=batch)
+            # Cached month summaries were built from the old rows
+            for user_id in batch:
+                bump_user_generation(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} rollup rows for {len(user_ids)} users."
+        ))
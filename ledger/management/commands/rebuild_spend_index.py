@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ledger.caching import bump_user_generation
+from ledger.spend_index import check_spend_index, rebuild_spend_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the cumulative spend index against the expense rows and "
+        "rebuild the users that drifted; --check only reports them and "
+        "--all rebuilds every user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only handle this username.")
+        parser.add_argument('--check', action='store_true', help="Report drift without rebuilding.")
+        parser.add_argument('--all', action='store_true', help="Rebuild without checking first.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Users handled per transaction.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        user_ids = list(users.values_list('pk', flat=True))
+
+        batch_size = options['batch_size']
+        drifted = []
+        written = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            if options['all']:
+                stale = batch
+            else:
+                stale = check_spend_index(batch)
+                for user_id in stale:
+                    self.stdout.write(f"User {user_id}: spend index differs from expenses")
+            drifted.extend(stale)
+            if stale and not options['check']:
+                written += rebuild_spend_index(user_ids=stale)
+                # Cached range totals were computed from the old rows
+                for user_id in stale:
+                    bump_user_generation(user_id)
+
+        if options['check']:
+            if drifted:
+                self.stdout.write(self.style.WARNING(
+                    f"{len(drifted)} of {len(user_ids)} users drifted. Re-run without --check to rebuild."
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"All {len(user_ids)} users' spend indexes are consistent."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {len(drifted)} of {len(user_ids)} users ({written} index rows)."
+            ))
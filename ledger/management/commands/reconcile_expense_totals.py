@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+
+from ledger.caching import bump_user_generation
+from ledger.carryover import propagate_carryover
+from ledger.models import DailyLedger
+
+
+class Command(BaseCommand):
+    help = "Verify the stored expense totals on DailyLedger and optionally repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only check ledgers of this username.")
+        parser.add_argument('--fix', action='store_true', help="Rewrite drifted totals from the expense rows.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        ledgers = DailyLedger.objects.order_by('pk')
+        if options['user']:
+            ledgers = ledgers.filter(user__username=options['user'])
+
+        rows = (
+            ledgers
+            .with_totals()
+            .values_list('pk', 'expense_total', 'expense_count', 'live_expense_total', 'live_expense_count')
+        )
+
+        checked = 0
+        drifted = []
+        for pk, stored_total, stored_count, actual_total, actual_count in rows.iterator(chunk_size=2000):
+            checked += 1
+            if stored_total != actual_total or stored_count != actual_count:
+                drifted.append(pk)
+                self.stdout.write(
+                    f"Ledger {pk}: stored {stored_total} ({stored_count}), "
+                    f"actual {actual_total} ({actual_count})"
+                )
+
+        if drifted and options['fix']:
+            batch_size = options['batch_size']
+            for start in range(0, len(drifted), batch_size):
+                DailyLedger.objects.filter(pk__in=drifted[start:start + batch_size]).recalculate_totals()
+            self.refresh_owners(drifted, batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} of {checked} ledgers."))
+        elif drifted:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drifted)} of {checked} ledgers drifted. Re-run with --fix to repair."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"All {checked} ledgers are consistent."))
+
+    def refresh_owners(self, ledger_ids, batch_size):
+        """Invalidate cached pages and re-carry budgets after repaired totals.
+
+        The bulk repair sends no signals, so each owner's generation is
+        bumped here and the carryover recomputed from their earliest
+        repaired day.
+        """
+        earliest = {}
+        for start in range(0, len(ledger_ids), batch_size):
+            rows = (
+                DailyLedger.objects
+                .filter(pk__in=ledger_ids[start:start + batch_size], user__isnull=False)
+                .values('user_id')
+                .annotate(first=Min('date'))
+                .values_list('user_id', 'first')
+            )
+            for user_id, first in rows:
+                earliest[user_id] = min(first, earliest.get(user_id, first))
+        for user in get_user_model().objects.filter(pk__in=earliest).order_by('pk'):
+            bump_user_generation(user.pk)
+            propagate_carryover(user, earliest[user.pk], preserve_manual_increases=False)
@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ledger.caching import bump_user_generation
+from ledger.models import SavingsAccount, SavingsTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify each savings balance against its transaction journal. Only "
+        "entries appended since the last verified checkpoint are summed; "
+        "--full re-sums every journal from the start."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only check the account of this username.")
+        parser.add_argument('--full', action='store_true', help="Ignore checkpoints and sum whole journals.")
+        parser.add_argument('--fix', action='store_true', help="Correct drifted balances to match the journal.")
+
+    def handle(self, *args, **options):
+        accounts = SavingsAccount.objects.order_by('pk')
+        if options['user']:
+            accounts = accounts.filter(user__username=options['user'])
+
+        since = Value(0) if options['full'] else Coalesce(OuterRef('journal_checkpoint_id'), Value(0))
+        entries = (
+            SavingsTransaction.objects
+            .filter(account=OuterRef('pk'), id__gt=since)
+            .order_by()
+            .values('account')
+        )
+        money = DecimalField(max_digits=12, decimal_places=2)
+        # Balance, checkpoint and new entries come from one statement, so
+        # they are a consistent snapshot even while deposits keep arriving.
+        rows = (
+            accounts
+            .annotate(
+                journal_delta=Coalesce(
+                    Subquery(entries.annotate(total=Sum('amount')).values('total')),
+                    Value(Decimal('0.00')),
+                    output_field=money,
+                ),
+                journal_last=Subquery(entries.annotate(last=Max('id')).values('last')),
+            )
+            .values_list(
+                'pk', 'user_id', 'balance', 'journal_checkpoint_id', 'journal_checkpoint_balance',
+                'journal_delta', 'journal_last',
+            )
+        )
+
+        checked = 0
+        advanced = []
+        drifted = []
+        for pk, user_id, balance, checkpoint_id, checkpoint_balance, delta, last in rows.iterator(chunk_size=2000):
+            checked += 1
+            base = Decimal('0.00') if options['full'] or checkpoint_id is None else checkpoint_balance
+            expected = base + delta
+            if balance != expected:
+                drifted.append((pk, user_id, expected - balance))
+                self.stdout.write(f"Account {pk}: balance {balance}, journal {expected}")
+            elif last is not None and last != checkpoint_id:
+                advanced.append(SavingsAccount(pk=pk, journal_checkpoint_id=last, journal_checkpoint_balance=expected))
+
+        SavingsAccount.objects.bulk_update(
+            advanced, ['journal_checkpoint_id', 'journal_checkpoint_balance'], batch_size=500,
+        )
+
+        if drifted and options['fix']:
+            for pk, user_id, correction in drifted:
+                # Relative, so a deposit landing meanwhile is kept
+                SavingsAccount.objects.filter(pk=pk).update(balance=F('balance') + correction)
+                if user_id is not None:
+                    bump_user_generation(user_id)
+            self.stdout.write(self.style.SUCCESS(f"Corrected {len(drifted)} of {checked} accounts."))
+        elif drifted:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drifted)} of {checked} accounts drifted. Re-run with --fix to correct them."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"All {checked} accounts match their journals ({len(advanced)} checkpoints advanced)."
+            ))
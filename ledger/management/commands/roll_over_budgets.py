@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from ledger.carryover import roll_over
+
+
+def _roll_range(args):
+    try:
+        return roll_over(*args)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Correct each user's stored day to the carryover from the days "
+        "before it, in bulk. Days that are not stored read their carry on "
+        "view; --materialize stores them too. Users are split into id "
+        "ranges and the ranges are processed by a pool of worker "
+        "processes. Meant to run nightly, shortly after midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Day to roll into, YYYY-MM-DD (default: today).")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Users per id range.")
+        parser.add_argument(
+            '--workers', type=int, default=min(4, os.cpu_count() or 1),
+            help="Worker processes; 1 runs the ranges in this process.",
+        )
+        parser.add_argument('--materialize', action='store_true', help="Also store missing days.")
+
+    def handle(self, *args, **options):
+        try:
+            target_date = date.fromisoformat(options['date']) if options['date'] else timezone.now().date()
+        except ValueError:
+            raise CommandError("--date must be YYYY-MM-DD.")
+        chunk_size = max(options['chunk_size'], 1)
+
+        user_ids = list(get_user_model().objects.order_by('pk').values_list('pk', flat=True))
+        ranges = [
+            (target_date, chunk[0], chunk[-1], options['materialize'])
+            for chunk in (user_ids[start:start + chunk_size] for start in range(0, len(user_ids), chunk_size))
+        ]
+
+        workers = min(options['workers'], len(ranges))
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Processes cannot share an in-memory database
+            workers = 1
+
+        if workers > 1:
+            # Forked children must not share the parent's connection
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                outcomes = pool.map(_roll_range, ranges)
+        else:
+            outcomes = [roll_over(*args) for args in ranges]
+
+        created = sum(outcome[0] for outcome in outcomes)
+        updated = sum(outcome[1] for outcome in outcomes)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled {len(user_ids)} users into {target_date} in {len(ranges)} ranges: "
+            f"{created} days created, {updated} corrected."
+        ))
@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ledger.synthetic import SCALES, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate users with categories, days and expenses for local "
+        "testing. The same --seed always produces the same history. Users "
+        "are named <prefix>-<n> and can sign in with --password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small',
+                            help="Named size; --users and --days override it.")
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--days', type=int, help="Days of history per user.")
+        parser.add_argument('--end', help="Last day of history, YYYY-MM-DD (default: today).")
+        parser.add_argument('--max-expenses', type=int, default=4, help="Most expenses per day.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default='seed')
+        parser.add_argument('--replace', action='store_true',
+                            help="Delete existing <prefix>-* users first instead of refusing.")
+
+    def handle(self, *args, **options):
+        scale = SCALES[options['scale']]
+        users = options['users'] if options['users'] is not None else scale['users']
+        days = options['days'] if options['days'] is not None else scale['days']
+        if users < 1 or days < 1:
+            raise CommandError("--users and --days must be at least 1.")
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else date.today()
+        except ValueError:
+            raise CommandError("--end must be YYYY-MM-DD.")
+
+        prefix = options['prefix']
+        existing = get_user_model().objects.filter(username__startswith=f"{prefix}-")
+        with transaction.atomic():
+            if existing.exists():
+                if not options['replace']:
+                    raise CommandError(f"Users named {prefix}-* already exist. Use --replace or another --prefix.")
+                deleted = existing.count()
+                existing.delete()
+                self.stdout.write(f"Deleted {deleted} existing {prefix}-* users.")
+            _users, ledgers, expenses = seed_users(
+                users, days, options['seed'], prefix=prefix, end=end,
+                max_expenses_per_day=options['max_expenses'], password=options['password'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {users} users ({prefix}-0 .. {prefix}-{users - 1}) with {ledgers} days "
+            f"and {expenses} expenses ending {end}."
+        ))
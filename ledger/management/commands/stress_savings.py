@@ -0,0 +1,116 @@
+import multiprocessing
+import threading
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+
+from ledger.models import DailyLedger, SavingsAccount, SavingsTransaction
+from ledger.savings import SavingsError, deposit, withdraw
+
+
+def _run_worker(user_id, operations, target_date, results):
+    """Alternate withdrawals of 1 and deposits of 1 on one account."""
+    user = get_user_model().objects.get(pk=user_id)
+    withdrawn = deposited = refused = 0
+    try:
+        for index in range(operations):
+            try:
+                if index % 2:
+                    deposit(user, Decimal('1'))
+                    deposited += 1
+                else:
+                    withdraw(user, Decimal('1'), target_date)
+                    withdrawn += 1
+            except SavingsError:
+                refused += 1
+    finally:
+        connection.close()
+    results.put((withdrawn, deposited, refused))
+
+
+def _threaded(user_id, threads, operations, target_date, results):
+    workers = [
+        threading.Thread(target=_run_worker, args=(user_id, operations, target_date, results))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one savings account from several processes and threads and "
+        "verify that no update was lost. Runs against the configured "
+        "database with a throwaway user, which is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=4, help="Threads per process.")
+        parser.add_argument('--operations', type=int, default=25, help="Operations per thread.")
+        parser.add_argument('--opening-balance', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError("Needs a database shared between processes, not in-memory SQLite.")
+
+        user = get_user_model().objects.create(username=f"stress-{uuid.uuid4().hex[:12]}")
+        opening = Decimal(options['opening_balance'])
+        if opening:
+            deposit(user, opening)
+        target_date = date.today()
+
+        try:
+            self.run(user, opening, target_date, options)
+        finally:
+            user.delete()
+
+    def run(self, user, opening, target_date, options):
+        # Forked children must not share the parent's connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_threaded,
+                args=(user.pk, options['threads'], options['operations'], target_date, results),
+            )
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in range(options['processes'] * options['threads'])]
+        for process in processes:
+            process.join()
+
+        withdrawn = sum(outcome[0] for outcome in outcomes)
+        deposited = sum(outcome[1] for outcome in outcomes)
+        refused = sum(outcome[2] for outcome in outcomes)
+        balance = SavingsAccount.objects.get(user=user).balance
+        budget = DailyLedger.objects.get(user=user, date=target_date).base_budget
+        expected = opening + deposited - withdrawn
+        journal = SavingsTransaction.objects.filter(account__user=user)
+        journal_total = journal.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        # Entries in id order must chain from one balance to the next
+        chained = list(journal.order_by('id').values_list('amount', 'balance_after'))
+        running = Decimal('0.00')
+        broken = 0
+        for amount, balance_after in chained:
+            running += amount
+            broken += running != balance_after
+
+        self.stdout.write(
+            f"{withdrawn} withdrawals, {deposited} deposits, {refused} refused; "
+            f"balance {balance} (expected {expected}), day budget {budget} (expected {withdrawn})"
+        )
+        self.stdout.write(f"journal: {len(chained)} entries summing to {journal_total}, {broken} out of order")
+        if balance != expected or budget != withdrawn or balance < 0 or journal_total != balance or broken:
+            raise CommandError("Lost or inconsistent savings updates.")
+        self.stdout.write(self.style.SUCCESS("No lost updates."))
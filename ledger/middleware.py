@@ -0,0 +1,86 @@
+# ledger/middleware.py
+"""Per-request SQL and latency instrumentation.
+
+Every query on every database connection goes through an execute
+wrapper that counts it and times it. The totals are sent back in a
+Server-Timing header (readable in the browser's network panel) and
+logged as one key=value line per request on the 'ledger.requests'
+logger.
+
+LEDGER_QUERY_BUDGETS maps URL names to the most queries a request to
+that view may run, either for any method or as a {method: limit} dict
+so writes can be given more room than reads. A request over budget logs
+a warning, or raises QueryBudgetExceeded when LEDGER_QUERY_BUDGET_STRICT
+is on, which makes the test client fail the test. Queries run while a
+streaming response is consumed happen after the middleware returns and
+are not counted.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('ledger.requests')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class _QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else None
+        if getattr(settings, 'LEDGER_SERVER_TIMING', True):
+            response['Server-Timing'] = (
+                f'sql;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+                f'total;dur={total * 1000:.1f}'
+            )
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': stats.count,
+            'sql_ms': round(stats.seconds * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }
+        logger.info(' '.join(f'{key}={value}' for key, value in fields.items()), extra=fields)
+
+        budget = getattr(settings, 'LEDGER_QUERY_BUDGETS', {}).get(view)
+        if isinstance(budget, dict):
+            budget = budget.get(request.method)
+        if budget is not None and stats.count > budget:
+            message = f"{view} ran {stats.count} queries, over its budget of {budget} ({request.path})"
+            if getattr(settings, 'LEDGER_QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra=fields)
+        return response
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:03
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_expense_totals(apps, schema_editor):
+    DailyLedger = apps.get_model('ledger', 'DailyLedger')
+    Expense = apps.get_model('ledger', 'Expense')
+
+    totals = (
+        Expense.objects
+        .values('daily_ledger_id')
+        .annotate(total=models.Sum('price'), count=models.Count('id'))
+        .order_by('daily_ledger_id')
+    )
+    batch = []
+    for row in totals.iterator(chunk_size=2000):
+        batch.append(DailyLedger(
+            pk=row['daily_ledger_id'],
+            expense_total=row['total'] or Decimal('0.00'),
+            expense_count=row['count'],
+        ))
+        if len(batch) >= 500:
+            DailyLedger.objects.bulk_update(batch, ['expense_total', 'expense_count'])
+            batch = []
+    if batch:
+        DailyLedger.objects.bulk_update(batch, ['expense_total', 'expense_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0005_dailyledger_is_manual_override'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyledger',
+            name='expense_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyledger',
+            name='expense_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.RunPython(backfill_expense_totals, migrations.RunPython.noop),
+    ]
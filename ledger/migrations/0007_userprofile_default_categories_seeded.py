@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0006_dailyledger_expense_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='default_categories_seeded',
+            field=models.BooleanField(default=False),
+        ),
+    ]
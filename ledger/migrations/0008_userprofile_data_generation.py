@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0007_userprofile_default_categories_seeded'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='data_generation',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
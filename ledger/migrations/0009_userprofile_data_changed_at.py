@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0008_userprofile_data_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='data_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0009_userprofile_data_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['daily_ledger', 'category', 'price'], name='ledger_expe_daily_l_dbfdd6_idx'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='daily_ledger',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='expenses', to='ledger.dailyledger'),
+        ),
+    ]
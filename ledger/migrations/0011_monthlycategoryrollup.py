@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:14
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_monthly_rollups(apps, schema_editor):
+    Expense = apps.get_model('ledger', 'Expense')
+    MonthlyCategoryRollup = apps.get_model('ledger', 'MonthlyCategoryRollup')
+
+    totals = (
+        Expense.objects
+        .filter(daily_ledger__user__isnull=False)
+        .annotate(year=ExtractYear('daily_ledger__date'), month=ExtractMonth('daily_ledger__date'))
+        .values('daily_ledger__user_id', 'year', 'month', 'category_id')
+        .annotate(total=models.Sum('price'), count=models.Count('id'))
+        .order_by()
+    )
+    batch = []
+    for row in totals.iterator(chunk_size=2000):
+        batch.append(MonthlyCategoryRollup(
+            user_id=row['daily_ledger__user_id'],
+            year=row['year'],
+            month=row['month'],
+            category_id=row['category_id'],
+            total=row['total'],
+            count=row['count'],
+        ))
+        if len(batch) >= 500:
+            MonthlyCategoryRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        MonthlyCategoryRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0010_expense_day_category_price_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='ledger.category')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'year', 'month'], name='ledger_mont_user_id_557d9a_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'year', 'month', 'category'), name='ledger_rollup_unique_category'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'year', 'month'), name='ledger_rollup_unique_uncategorized')],
+            },
+        ),
+        migrations.RunPython(backfill_monthly_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def open_journals(apps, schema_editor):
+    """Start each account's journal with its current balance."""
+    SavingsAccount = apps.get_model('ledger', 'SavingsAccount')
+    SavingsTransaction = apps.get_model('ledger', 'SavingsTransaction')
+
+    batch = []
+    for account_id, balance in SavingsAccount.objects.exclude(balance=0).values_list('pk', 'balance').iterator():
+        batch.append(SavingsTransaction(
+            account_id=account_id, kind='opening', amount=balance, balance_after=balance,
+        ))
+        if len(batch) >= 500:
+            SavingsTransaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        SavingsTransaction.objects.bulk_create(batch)
+
+
+def close_journals(apps, schema_editor):
+    apps.get_model('ledger', 'SavingsTransaction').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0011_monthlycategoryrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='journal_checkpoint_balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='savingsaccount',
+            name='journal_checkpoint_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SavingsTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('deposit', 'Deposit'), ('withdraw', 'Withdrawal')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('target_date', models.DateField(blank=True, null=True)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='ledger.savingsaccount')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'id'], name='ledger_savi_account_96d6d7_idx')],
+            },
+        ),
+        migrations.RunPython(open_journals, close_journals),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-17 01:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_cumulative_spend(apps, schema_editor):
+    Expense = apps.get_model('ledger', 'Expense')
+    CumulativeSpend = apps.get_model('ledger', 'CumulativeSpend')
+
+    days = (
+        Expense.objects
+        .filter(daily_ledger__user__isnull=False)
+        .values_list('daily_ledger__user_id', 'daily_ledger__date')
+        .annotate(spent=models.Sum('price'))
+        .order_by('daily_ledger__user_id', 'daily_ledger__date')
+    )
+    current_user = None
+    running = Decimal('0.00')
+    batch = []
+    for user_id, day, spent in days.iterator(chunk_size=2000):
+        if user_id != current_user:
+            current_user, running = user_id, Decimal('0.00')
+        running += spent
+        batch.append(CumulativeSpend(user_id=user_id, date=day, total=running))
+        if len(batch) >= 500:
+            CumulativeSpend.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        CumulativeSpend.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0012_savingstransaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CumulativeSpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cumulative_spend', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='ledger_cumulative_spend_unique_day')],
+            },
+        ),
+        migrations.RunPython(backfill_cumulative_spend, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 # ledger/models.py
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 from decimal import Decimal
 import uuid
 from django.core.validators import RegexValidator
@@ -17,14 +19,93 @@ DEFAULT_CATEGORY_DEFINITIONS = [
 
 class SavingsAccount(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='savings_account', null=True, blank=True)
+    # Snapshot of the SavingsTransaction journal, kept for O(1) reads.
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    # Last journal entry verified by reconcile_savings and the balance up
+    # to it, so each run only sums the entries appended since.
+    journal_checkpoint_id = models.BigIntegerField(null=True, blank=True)
+    journal_checkpoint_balance = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Total Savings: {self.balance}"
 
+
+class SavingsTransaction(models.Model):
+    """One append-only entry of a savings account's journal.
+
+    amount is signed: positive for deposits (and the opening balance),
+    negative for withdrawals. The journal sums to the account balance.
+    """
+    OPENING = 'opening'
+    DEPOSIT = 'deposit'
+    WITHDRAW = 'withdraw'
+    KIND_CHOICES = [
+        (OPENING, 'Opening balance'),
+        (DEPOSIT, 'Deposit'),
+        (WITHDRAW, 'Withdrawal'),
+    ]
+
+    account = models.ForeignKey(SavingsAccount, on_delete=models.CASCADE, related_name='transactions', db_index=False)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # The day a withdrawal was added to, when there is one
+    target_date = models.DateField(null=True, blank=True)
+    balance_after = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Serves the account FK and keyset pagination by id
+            models.Index(fields=['account', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} -> {self.balance_after}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Savings transactions are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Savings transactions are append-only.")
+
 # ledger/models.py
 
+class DailyLedgerQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate each ledger with the live sum and count of its expenses.
+
+        Derived properties on the returned instances use the annotation and
+        never query again. Useful where the stored totals are not trusted,
+        such as drift checks.
+        """
+        return self.annotate(
+            live_expense_total=Coalesce(
+                models.Sum('expenses__price'),
+                models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            live_expense_count=models.Count('expenses'),
+        )
+
+    def recalculate_totals(self):
+        """Recompute the stored expense totals of these ledgers from their expenses."""
+        expenses = Expense.objects.filter(daily_ledger=models.OuterRef('pk')).order_by().values('daily_ledger')
+        return self.update(
+            expense_total=Coalesce(
+                models.Subquery(expenses.annotate(total=models.Sum('price')).values('total')),
+                models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            expense_count=Coalesce(
+                models.Subquery(expenses.annotate(count=models.Count('pk')).values('count')),
+                models.Value(0),
+            ),
+        )
+
+
 class DailyLedger(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_ledgers', null=True, blank=True)
     date = models.DateField(default=timezone.now)
@@ -32,13 +113,85 @@ class DailyLedger(models.Model):
     # When True, auto-carry logic in the view will not overwrite base_budget for this date
     # allowing manual changes such as savings withdrawal or reset to persist.
     is_manual_override = models.BooleanField(default=False)
+    # Denormalized sum and count of this day's expenses. Kept in sync with
+    # F() updates by the Expense signal handlers so reads never aggregate.
+    expense_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    expense_count = models.PositiveIntegerField(default=0)
+
+    objects = DailyLedgerQuerySet.as_manager()
 
     def __str__(self):
         return self.date.strftime('%Y-%m-%d')
 
+    @classmethod
+    def apply_expense_delta(cls, ledger_id, amount, count):
+        """Atomically shift the stored totals of one ledger."""
+        return cls.objects.filter(pk=ledger_id).update(
+            expense_total=models.F('expense_total') + amount,
+            expense_count=models.F('expense_count') + count,
+        )
+
     @property
     def total_expenses(self):
-        return self.expenses.aggregate(total=models.Sum('price'))['total'] or Decimal('0.00')
+        # Prefer the live sum annotated by with_totals(); otherwise read the
+        # stored column, reloading it once if it was invalidated.
+        if 'live_expense_total' in self.__dict__:
+            return self.live_expense_total
+        if 'expense_total' not in self.__dict__:
+            self.refresh_from_db(fields=['expense_total', 'expense_count'])
+        return self.expense_total
+
+    def invalidate_totals(self):
+        """Forget totals and derived values after this day's expenses changed.
+
+        Called by the Expense signal handlers on a loaded parent ledger. The
+        stored totals are reloaded from the database on next access.
+        """
+        for attr in ('_derived', 'live_expense_total', 'live_expense_count', 'expense_total', 'expense_count'):
+            self.__dict__.pop(attr, None)
+
+    def _derived_values(self):
+        """Compute the figures derived from base budget and spend once.
+
+        The result is memoized on the instance and keyed by the inputs, so
+        reassigning base_budget (as the budget views do) is picked up.
+        """
+        base = self.base_budget
+        total = self.total_expenses
+        cached = self.__dict__.get('_derived')
+        if cached is not None and cached[0] == (base, total):
+            return cached[1]
+
+        zero = Decimal('0.00')
+        savings = base - total
+        remaining = savings if savings > zero else zero
+
+        if base > zero:
+            usage = (total / base) * Decimal('100')
+        else:
+            # No budget allocated: if anything was spent, treat as 100%+ usage
+            usage = Decimal('100.00') if total > zero else zero
+
+        # Determine status relative to base budget (not remaining).
+        if base == zero:
+            status = "Overspent" if total > zero else "Underspent"
+        elif total >= base:
+            # Overspent: 100% or more of allocated budget
+            status = "Overspent"
+        elif usage >= Decimal('50'):
+            # Balanced: 50% up to below 100% of allocated budget
+            status = "Balanced"
+        else:
+            status = "Underspent"
+
+        values = {
+            'remaining': remaining,
+            'savings': savings,
+            'usage': usage,
+            'status': status,
+        }
+        self._derived = ((base, total), values)
+        return values
 
     @property
     def total_rollover(self):
@@ -48,8 +201,7 @@ class DailyLedger(models.Model):
     @property
     def remaining_budget(self):
         """Remaining budget for the day (can be zero but never negative for display)."""
-        remaining = self.base_budget - self.total_expenses
-        return remaining if remaining > Decimal('0.00') else Decimal('0.00')
+        return self._derived_values()['remaining']
 
     @property
     def effective_budget(self):
@@ -59,31 +211,16 @@ class DailyLedger(models.Model):
     @property
     def daily_savings(self):
         """Savings relative to the day's base budget only (no rollover)."""
-        return self.base_budget - self.total_expenses
+        return self._derived_values()['savings']
 
     @property
     def budget_usage_percentage(self):
         """Percentage of the allocated base budget that has been spent."""
-        allocated = self.base_budget
-        if allocated > Decimal('0.00'):
-            return (self.total_expenses / allocated) * Decimal('100')
-        # No budget allocated: if anything was spent, treat as 100%+ usage
-        return Decimal('100.00') if self.total_expenses > Decimal('0.00') else Decimal('0.00')
+        return self._derived_values()['usage']
 
     @property
     def status(self):
-        # Determine status relative to base budget (not remaining).
-        if self.base_budget == Decimal('0.00'):
-            return "Overspent" if self.total_expenses > Decimal('0.00') else "Underspent"
-
-        usage = (self.total_expenses / self.base_budget) * Decimal('100')
-        # Overspent: 100% or more of allocated budget
-        if self.total_expenses >= self.base_budget:
-            return "Overspent"
-        # Balanced: 50% up to below 100% of allocated budget
-        if usage >= Decimal('50') and usage < Decimal('100'):
-            return "Balanced"
-        return "Underspent"
+        return self._derived_values()['status']
     
     class Meta:
         unique_together = (('user', 'date'),)
@@ -117,33 +254,137 @@ class Category(models.Model):
         return self.title
 
 
+def seed_default_categories(user):
+    """Insert whichever default categories a user is missing, in one statement."""
+    Category.objects.bulk_create(
+        [Category(user=user, title=title, color=color) for title, color in DEFAULT_CATEGORY_DEFINITIONS],
+        ignore_conflicts=True,
+    )
+
+
 def ensure_default_categories_for_user(user):
-    """Create the project's default categories for a user if missing.
+    """Seed the project's default categories for a user at most once.
 
-    This is idempotent and safe to call on every request. It will only
-    create what does not already exist for the given user.
+    Signup already seeds them and sets UserProfile.default_categories_seeded.
+    A per-user cache marker makes repeat calls free; on a cache miss the
+    profile flag is checked and seeding only runs if it was never done.
     """
-    for title, color in DEFAULT_CATEGORY_DEFINITIONS:
-        try:
-            Category.objects.get_or_create(user=user, title=title, defaults={"color": color})
-        except Exception:
-            # In case of race condition during concurrent creation, continue
-            pass
+    key = f"ledger:categories-seeded:{user.pk}"
+    if cache.get(key):
+        return
+    if not UserProfile.objects.filter(user=user, default_categories_seeded=True).exists():
+        seed_default_categories(user)
+        UserProfile.objects.filter(user=user).update(
+            default_categories_seeded=True,
+            data_generation=models.F('data_generation') + 1,
+            data_changed_at=timezone.now(),
+        )
+    cache.set(key, True, None)
 
 class Expense(models.Model):
-    daily_ledger = models.ForeignKey(DailyLedger, on_delete=models.CASCADE, related_name='expenses')
+    # Indexed through the (daily_ledger, category, price) index below.
+    daily_ledger = models.ForeignKey(DailyLedger, on_delete=models.CASCADE, related_name='expenses', db_index=False)
     category = models.ForeignKey('Category', on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses')
     description = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-day, per-category sums (monthly summary) can be answered
+            # from the index alone; price is a key column so this works on
+            # every backend, not only those supporting INCLUDE.
+            models.Index(fields=['daily_ledger', 'category', 'price']),
+        ]
+
     def __str__(self):
         return f"{self.description} - {self.price}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_stored_values()
+        return instance
+
+    def remember_stored_values(self):
+        """Record what is in the database so an edit can be applied as a delta."""
+        self._stored_price = self.__dict__.get('price')
+        self._stored_daily_ledger_id = self.__dict__.get('daily_ledger_id')
+        self._stored_category_id = self.__dict__.get('category_id')
+
+
+class MonthlyCategoryRollup(models.Model):
+    """Sum and count of one user's expenses per calendar month and category.
+
+    Maintained incrementally by the Expense signal handlers (see
+    ledger.rollups); a null category holds the uncategorized expenses.
+    Rebuild with the rebuild_monthly_rollups management command.
+    """
+    # Indexed through the (user, year, month) index below.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_rollups', db_index=False)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, null=True, blank=True, related_name='monthly_rollups')
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # The partial unique indexes cannot serve a lookup of all of a
+            # month's rows, so that gets its own index.
+            models.Index(fields=['user', 'year', 'month']),
+        ]
+        constraints = [
+            # NULLs are distinct in unique indexes, so the uncategorized
+            # row needs its own partial constraint.
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month', 'category'],
+                condition=models.Q(category__isnull=False),
+                name='ledger_rollup_unique_category',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month'],
+                condition=models.Q(category__isnull=True),
+                name='ledger_rollup_unique_uncategorized',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} {self.category or 'Uncategorized'}: {self.total}"
+
+
+class CumulativeSpend(models.Model):
+    """Running total of one user's expenses through a date.
+
+    One row per day that has (or had) expenses, holding everything spent
+    up to and including that day, so the spend over any date range is the
+    difference of two rows. Maintained incrementally by the Expense signal
+    handlers (see ledger.spend_index); rebuild with the
+    rebuild_spend_index management command.
+    """
+    # Indexed through the unique (user, date) constraint below.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cumulative_spend', db_index=False)
+    date = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='ledger_cumulative_spend_unique_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: {self.total}"
+
 
 class UserProfile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile')
+    # Set once the default categories have been created for this user.
+    default_categories_seeded = models.BooleanField(default=False)
+    # Bumped on every change to the user's ledger data; versions cache keys.
+    data_generation = models.PositiveBigIntegerField(default=0)
+    # When data_generation last moved.
+    data_changed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,118 @@
+# ledger/rollups.py
+"""Monthly per-category expense rollups.
+
+MonthlyCategoryRollup holds one row per (user, year, month, category).
+The Expense signal handlers shift it by each change, so month views read
+a handful of rows instead of aggregating raw expenses. Anything that
+writes expenses without signals (bulk_create, queryset updates) must call
+rebuild_rollups() for the users and months it touched.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import DailyLedger, Expense, MonthlyCategoryRollup
+from .utils import month_bounds
+
+
+def ledger_month(expense, ledger_id):
+    """Return (user_id, year, month) of a ledger, using the loaded parent if possible."""
+    if Expense.daily_ledger.is_cached(expense):
+        ledger = expense.daily_ledger
+        if ledger is not None and ledger.pk == ledger_id:
+            return ledger.user_id, ledger.date.year, ledger.date.month
+    row = DailyLedger.objects.filter(pk=ledger_id).values_list('user_id', 'date').first()
+    if row is None or row[0] is None:
+        return None
+    user_id, day = row
+    return user_id, day.year, day.month
+
+
+def apply_rollup_delta(user_id, year, month, category_id, amount, count):
+    """Shift one rollup row, creating it on first use.
+
+    Removals never create rows, and a row whose count reaches zero is
+    deleted so the month only lists categories that were used.
+    """
+    if not amount and not count:
+        return
+    rows = MonthlyCategoryRollup.objects.filter(user_id=user_id, year=year, month=month, category_id=category_id)
+    if rows.update(total=F('total') + amount, count=F('count') + count):
+        if count < 0:
+            rows.filter(count__lte=0).delete()
+        return
+    if count <= 0:
+        # Nothing to take from; the rollup was already out of sync and
+        # only a rebuild can repair it.
+        return
+    try:
+        with transaction.atomic():
+            MonthlyCategoryRollup.objects.create(
+                user_id=user_id, year=year, month=month, category_id=category_id, total=amount, count=count,
+            )
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(total=F('total') + amount, count=F('count') + count)
+
+
+def _month_ranges(months):
+    query = Q()
+    for year, month in months:
+        first, next_first = month_bounds(year, month)
+        query |= Q(daily_ledger__date__gte=first, daily_ledger__date__lt=next_first)
+    return query
+
+
+def _month_keys(months):
+    query = Q()
+    for year, month in months:
+        query |= Q(year=year, month=month)
+    return query
+
+
+def rebuild_rollups(user_ids=None, months=None, batch_size=1000):
+    """Recompute rollups from the expense rows and return how many were written.
+
+    Limited to the given user ids and (year, month) pairs when provided;
+    the default rebuilds every user's whole history.
+    """
+    expenses = Expense.objects.filter(daily_ledger__user__isnull=False)
+    stale = MonthlyCategoryRollup.objects.all()
+    if user_ids is not None:
+        expenses = expenses.filter(daily_ledger__user_id__in=user_ids)
+        stale = stale.filter(user_id__in=user_ids)
+    if months is not None:
+        months = list(months)
+        if not months:
+            return 0
+        expenses = expenses.filter(_month_ranges(months))
+        stale = stale.filter(_month_keys(months))
+
+    aggregates = (
+        expenses
+        .annotate(year=ExtractYear('daily_ledger__date'), month=ExtractMonth('daily_ledger__date'))
+        .values('daily_ledger__user_id', 'year', 'month', 'category_id')
+        .annotate(total=Sum('price'), count=Count('pk'))
+        .order_by()
+    )
+    with transaction.atomic():
+        stale.delete()
+        written = 0
+        batch = []
+        for row in aggregates.iterator(chunk_size=2000):
+            batch.append(MonthlyCategoryRollup(
+                user_id=row['daily_ledger__user_id'],
+                year=row['year'],
+                month=row['month'],
+                category_id=row['category_id'],
+                total=row['total'],
+                count=row['count'],
+            ))
+            if len(batch) >= batch_size:
+                MonthlyCategoryRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            MonthlyCategoryRollup.objects.bulk_create(batch)
+            written += len(batch)
+    return written
@@ -0,0 +1,128 @@
+# ledger/savings.py
+"""Savings deposits and withdrawals as atomic database updates.
+
+Balances are never read, changed in Python and saved back. Each change is
+a single UPDATE with F() arithmetic, and a withdrawal carries its balance
+guard in the WHERE clause, so two requests racing on one account can
+neither lose an update nor overdraw it. A withdrawal also moves the money
+into a day's base budget; both rows change in one transaction, which is
+retried when the database reports a lock or serialization conflict.
+
+Every change is appended to the SavingsTransaction journal in the same
+transaction; SavingsAccount.balance is the snapshot read by the pages.
+update() sends no signals, so the user's data generation is bumped here.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import bump_user_generation
+from .carryover import get_or_create_day, propagate_carryover
+from .models import DailyLedger, SavingsAccount, SavingsTransaction
+
+
+RETRY_TIMEOUT = 5.0   # seconds spent retrying before giving up
+RETRY_BACKOFF = 0.005  # first pause, doubled after every failed attempt
+RETRY_BACKOFF_MAX = 0.2
+
+
+class SavingsError(Exception):
+    """A savings change that was refused; the message is shown to the user."""
+
+
+def run_atomic_with_retry(operation, timeout=RETRY_TIMEOUT):
+    """Run operation() in its own transaction, retrying on conflicts.
+
+    Lock timeouts, deadlocks and serialization failures surface as
+    OperationalError and leave nothing behind, so the whole transaction is
+    simply run again until the timeout runs out. Inside an outer
+    transaction there is nothing to retry and the error propagates.
+    """
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        try:
+            with transaction.atomic():
+                return operation()
+        except OperationalError:
+            if connection.in_atomic_block or time.monotonic() >= deadline:
+                raise
+            # Jitter keeps colliding requests from retrying in lockstep
+            pause = min(RETRY_BACKOFF * (2 ** attempt), RETRY_BACKOFF_MAX)
+            time.sleep(pause * random.uniform(0.5, 1.5))
+            attempt += 1
+
+
+def _shift_balance(user, amount, **guard):
+    """Add amount to the user's balance in one UPDATE; False if no row matched.
+
+    Each transaction starts with this write, so on databases that lock
+    whole tables the lock is taken up front instead of upgraded from a
+    read, which would deadlock two concurrent requests.
+    """
+    rows = SavingsAccount.objects.filter(user=user, **guard)
+    return bool(rows.update(balance=F('balance') + amount, updated_at=timezone.now()))
+
+
+def _journal(user, kind, amount, target_date=None):
+    """Append the change just applied to the user's journal.
+
+    Runs while the account row is still locked by the balance update, so
+    the resulting balance read here is exactly this change's.
+    """
+    account_id, balance = SavingsAccount.objects.filter(user=user).values_list('pk', 'balance').get()
+    SavingsTransaction.objects.create(
+        account_id=account_id, kind=kind, amount=amount, target_date=target_date, balance_after=balance,
+    )
+
+
+def deposit(user, amount):
+    """Add a whole, positive amount to the user's savings."""
+    if amount <= 0:
+        raise SavingsError("Amount must be a whole, positive number.")
+    if amount != amount.to_integral_value():
+        raise SavingsError("Amount must be a whole number (no decimals).")
+
+    def apply():
+        if not _shift_balance(user, amount):
+            SavingsAccount.objects.get_or_create(user=user)
+            _shift_balance(user, amount)
+        _journal(user, SavingsTransaction.DEPOSIT, amount)
+        bump_user_generation(user.pk)
+
+    run_atomic_with_retry(apply)
+
+
+def withdraw(user, amount, target_date):
+    """Move amount from savings into target_date's base budget.
+
+    The day becomes a manual override so carryover keeps the added budget,
+    and the days after it are recomputed.
+    """
+    if amount <= 0:
+        raise SavingsError("Amount must be a positive number.")
+
+    def apply():
+        # The guarded UPDATE also row-locks the account until commit, so
+        # concurrent withdrawals of one user run their carryover in turn.
+        if not _shift_balance(user, -amount, balance__gte=amount):
+            balance = SavingsAccount.objects.filter(user=user).values_list('balance', flat=True).first()
+            if balance is None or balance <= Decimal('0.00'):
+                raise SavingsError("Cannot withdraw. Savings is zero or negative.")
+            raise SavingsError("Cannot withdraw more than available savings.")
+        _journal(user, SavingsTransaction.WITHDRAW, -amount, target_date)
+
+        ledger = get_or_create_day(user, target_date)
+        DailyLedger.objects.filter(pk=ledger.pk).update(
+            base_budget=F('base_budget') + amount, is_manual_override=True,
+        )
+        # Changing this day's base affects future carryover.
+        # Preserve manual increases so we don't lower future days.
+        propagate_carryover(user, target_date, preserve_manual_increases=True)
+        bump_user_generation(user.pk)
+
+    run_atomic_with_retry(apply)
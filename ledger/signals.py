@@ -1,7 +1,15 @@
-from django.db.models.signals import post_save
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserProfile, SavingsAccount, ensure_default_categories_for_user
+from .models import UserProfile, SavingsAccount, DailyLedger, Expense, Category, MonthlyCategoryRollup, seed_default_categories
+from .caching import bump_user_generation, bump_generation_for_ledger
+from .rollups import apply_rollup_delta, ledger_month, rebuild_rollups
+from .spend_index import apply_spend_delta, ledger_day, rebuild_spend_index
 
 
 User = get_user_model()
@@ -10,8 +18,164 @@ User = get_user_model()
 @receiver(post_save, sender=User)
 def create_user_related_models(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance)
-        SavingsAccount.objects.create(user=instance)
         # Seed default categories for this user
-        ensure_default_categories_for_user(instance)
+        seed_default_categories(instance)
+        UserProfile.objects.create(user=instance, default_categories_seeded=True)
+        SavingsAccount.objects.create(user=instance)
+
+
+def _shift_ledger_totals(expense, ledger_id, amount, count):
+    """Apply a delta to the stored totals and invalidate the cached parent, if loaded."""
+    if not amount and not count:
+        return
+    DailyLedger.apply_expense_delta(ledger_id, amount, count)
+    if Expense.daily_ledger.is_cached(expense):
+        ledger = expense.daily_ledger
+        if ledger is not None and ledger.pk == ledger_id:
+            ledger.invalidate_totals()
+
+
+def _shift_rollup(expense, ledger_id, category_id, amount, count, month=None):
+    """Apply a delta to the monthly category rollup of the ledger's month."""
+    month = month or ledger_month(expense, ledger_id)
+    if month is not None:
+        apply_rollup_delta(*month, category_id, amount, count)
+    return month
+
+
+def _shift_spend(expense, ledger_id, amount):
+    """Apply a delta to the user's cumulative spend from the ledger's date on."""
+    day = ledger_day(expense, ledger_id)
+    if day is not None:
+        apply_spend_delta(*day, amount)
+
+
+@receiver(post_save, sender=Expense)
+def update_ledger_totals_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    price = Decimal(instance.price)
+    if created:
+        _shift_ledger_totals(instance, instance.daily_ledger_id, price, 1)
+        _shift_rollup(instance, instance.daily_ledger_id, instance.category_id, price, 1)
+        _shift_spend(instance, instance.daily_ledger_id, price)
+    else:
+        stored_price = getattr(instance, '_stored_price', None)
+        stored_ledger_id = getattr(instance, '_stored_daily_ledger_id', None)
+        stored_category_id = getattr(instance, '_stored_category_id', None)
+        if stored_price is None or stored_ledger_id is None:
+            # Saved without being loaded first; we cannot know the old
+            # values, so recount the ledger from its expenses.
+            DailyLedger.objects.filter(pk=instance.daily_ledger_id).recalculate_totals()
+            if Expense.daily_ledger.is_cached(instance) and instance.daily_ledger is not None:
+                instance.daily_ledger.invalidate_totals()
+            month = ledger_month(instance, instance.daily_ledger_id)
+            if month is not None:
+                user_id, year, month_number = month
+                rebuild_rollups(user_ids=[user_id], months=[(year, month_number)])
+                rebuild_spend_index(user_ids=[user_id])
+        elif stored_ledger_id != instance.daily_ledger_id:
+            _shift_ledger_totals(instance, stored_ledger_id, -stored_price, -1)
+            _shift_ledger_totals(instance, instance.daily_ledger_id, price, 1)
+            _shift_rollup(instance, stored_ledger_id, stored_category_id, -stored_price, -1)
+            _shift_rollup(instance, instance.daily_ledger_id, instance.category_id, price, 1)
+            _shift_spend(instance, stored_ledger_id, -stored_price)
+            _shift_spend(instance, instance.daily_ledger_id, price)
+        else:
+            _shift_ledger_totals(instance, instance.daily_ledger_id, price - stored_price, 0)
+            _shift_spend(instance, instance.daily_ledger_id, price - stored_price)
+            if stored_category_id != instance.category_id:
+                month = _shift_rollup(instance, stored_ledger_id, stored_category_id, -stored_price, -1)
+                _shift_rollup(instance, instance.daily_ledger_id, instance.category_id, price, 1, month)
+            else:
+                _shift_rollup(instance, instance.daily_ledger_id, instance.category_id, price - stored_price, 0)
+        if stored_ledger_id is not None and stored_ledger_id != instance.daily_ledger_id:
+            bump_generation_for_ledger(stored_ledger_id)
+    bump_generation_for_ledger(instance.daily_ledger_id)
+    instance.remember_stored_values()
+
+
+# When a whole user is deleted, their days, expenses, categories, rollups
+# and index rows all cascade away, so there is nothing to keep in step.
+
+def _deleting_users(origin):
+    if isinstance(origin, User):
+        return True
+    return isinstance(origin, QuerySet) and origin.model is User
+
+
+@receiver(post_delete, sender=Expense)
+def update_ledger_totals_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleting_users(origin):
+        return
+    price = getattr(instance, '_stored_price', None)
+    if price is None:
+        price = instance.price
+    ledger_id = getattr(instance, '_stored_daily_ledger_id', None) or instance.daily_ledger_id
+    category_id = getattr(instance, '_stored_category_id', None) or instance.category_id
+    _shift_ledger_totals(instance, ledger_id, -Decimal(price), -1)
+    _shift_rollup(instance, ledger_id, category_id, -Decimal(price), -1)
+    _shift_spend(instance, ledger_id, -Decimal(price))
+    bump_generation_for_ledger(ledger_id)
+
+
+# Deleting a category turns its expenses into uncategorized ones without
+# sending Expense signals, and cascades its rollup rows. The affected
+# months are remembered and rebuilt afterwards, but only when the category
+# itself was deleted; when the whole user goes, there is nothing to keep.
+
+def _deleting_categories(origin):
+    if isinstance(origin, Category):
+        return True
+    return isinstance(origin, QuerySet) and origin.model is Category
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_rollup_months(sender, instance, origin=None, **kwargs):
+    if _deleting_categories(origin):
+        instance._rollup_months = list(
+            MonthlyCategoryRollup.objects.filter(category=instance).values_list('year', 'month')
+        )
+
+
+@receiver(post_delete, sender=Category)
+def rebuild_category_rollup_months(sender, instance, **kwargs):
+    months = getattr(instance, '_rollup_months', None)
+    if months:
+        rebuild_rollups(user_ids=[instance.user_id], months=months)
+
+
+# Cached per-user payloads (see ledger.caching) are invalidated by bumping
+# the owner's data generation whenever budgets, categories, savings or the
+# account itself change.
+
+@receiver(post_save, sender=DailyLedger)
+@receiver(post_delete, sender=DailyLedger)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SavingsAccount)
+def invalidate_user_payloads(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or instance.user_id is None or _deleting_users(origin):
+        return
+    bump_user_generation(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_pages(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Every page shows the username. A login only saves last_login and
+    # already changes the ETag through the new session key.
+    if raw or created or update_fields == frozenset({'last_login'}):
+        return
+    bump_user_generation(instance.pk)
+
+
+# SQLite connections are tuned for concurrent writers when they open
+# (see LEDGER_SQLITE_PRAGMAS in settings).
 
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'LEDGER_SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,159 @@
+# ledger/spend_index.py
+"""Per-user prefix sums of spending, for date-range totals in two lookups.
+
+CumulativeSpend holds, for each day with expenses, the user's total
+spend through that day. The spend between two dates is the running total
+at the end minus the one just before the start, each found by one index
+seek on (user, date). The Expense signal handlers shift the index by
+every change: the changed day and all later rows move by the same
+amount, in two UPDATE statements. Anything that writes expenses without
+signals must call rebuild_spend_index() for the users it touched.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import CumulativeSpend, DailyLedger, Expense, UserProfile
+
+
+ZERO = Decimal('0.00')
+
+
+def ledger_day(expense, ledger_id):
+    """Return (user_id, date) of a ledger, using the loaded parent if possible."""
+    if Expense.daily_ledger.is_cached(expense):
+        ledger = expense.daily_ledger
+        if ledger is not None and ledger.pk == ledger_id:
+            return ledger.user_id, ledger.date
+    row = DailyLedger.objects.filter(pk=ledger_id).values_list('user_id', 'date').first()
+    if row is None or row[0] is None:
+        return None
+    return row
+
+
+def apply_spend_delta(user_id, day: date, amount):
+    """Add amount to the running totals from day onwards."""
+    if not amount:
+        return
+    with transaction.atomic():
+        # Changes for one user are applied one at a time, so a new row's
+        # starting total cannot miss a concurrent shift of later rows.
+        list(UserProfile.objects.select_for_update().filter(user_id=user_id).values_list('pk'))
+        CumulativeSpend.objects.filter(user_id=user_id, date__gt=day).update(total=F('total') + amount)
+        rows = CumulativeSpend.objects.filter(user_id=user_id, date=day)
+        if rows.update(total=F('total') + amount) or amount < 0:
+            # A removal always has its day's row, unless the rows are
+            # already gone with the user; never start one below zero.
+            return
+        before = cumulative_through(user_id, day - timedelta(days=1))
+        try:
+            with transaction.atomic():
+                CumulativeSpend.objects.create(user_id=user_id, date=day, total=before + amount)
+        except IntegrityError:
+            # Another request created the row first
+            rows.update(total=F('total') + amount)
+
+
+def cumulative_through(user_id, day: date):
+    """Return everything the user spent up to and including day."""
+    total = (
+        CumulativeSpend.objects
+        .filter(user_id=user_id, date__lte=day)
+        .order_by('-date')
+        .values_list('total', flat=True)
+        .first()
+    )
+    return total if total is not None else ZERO
+
+
+def spend_between(user_id, first: date, last: date):
+    """Return the user's spend from first to last, both inclusive."""
+    total = cumulative_through(user_id, last)
+    if first > date.min:
+        total -= cumulative_through(user_id, first - timedelta(days=1))
+    return total
+
+
+def expected_index(user_ids=None):
+    """Yield (user_id, date, running total) computed from the expense rows."""
+    days = Expense.objects.filter(daily_ledger__user__isnull=False)
+    if user_ids is not None:
+        days = days.filter(daily_ledger__user_id__in=user_ids)
+    days = (
+        days
+        .values_list('daily_ledger__user_id', 'daily_ledger__date')
+        .annotate(spent=Sum('price'))
+        .order_by('daily_ledger__user_id', 'daily_ledger__date')
+    )
+    current_user = None
+    running = ZERO
+    for user_id, day, spent in days.iterator(chunk_size=2000):
+        if user_id != current_user:
+            current_user, running = user_id, ZERO
+        running += spent
+        yield user_id, day, running
+
+
+def rebuild_spend_index(user_ids=None, batch_size=1000):
+    """Recompute the index from the expense rows and return how many rows were written.
+
+    Limited to the given user ids when provided; the default rebuilds
+    every user.
+    """
+    stale = CumulativeSpend.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        stale = stale.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        stale.delete()
+        written = 0
+        batch = []
+        for user_id, day, total in expected_index(user_ids):
+            batch.append(CumulativeSpend(user_id=user_id, date=day, total=total))
+            if len(batch) >= batch_size:
+                CumulativeSpend.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            CumulativeSpend.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def check_spend_index(user_ids=None):
+    """Return the ids of users whose stored index differs from the expense rows.
+
+    Every day with expenses needs its row. Days whose expenses were all
+    removed may keep a row, which must then hold the running total of
+    the day before. Loads the users' rows at once, so check in batches.
+    """
+    stored = CumulativeSpend.objects.order_by('user_id', 'date')
+    if user_ids is not None:
+        stored = stored.filter(user_id__in=user_ids)
+    have = {}
+    for user_id, day, total in stored.values_list('user_id', 'date', 'total').iterator(chunk_size=2000):
+        have.setdefault(user_id, []).append((day, total))
+    want = {}
+    for user_id, day, total in expected_index(user_ids):
+        want.setdefault(user_id, []).append((day, total))
+
+    drifted = []
+    for user_id in sorted(set(have) | set(want)):
+        rows, expected = have.get(user_id, []), want.get(user_id, [])
+        if not {day for day, _total in expected} <= {day for day, _total in rows}:
+            drifted.append(user_id)
+            continue
+        running = ZERO
+        position = 0
+        for day, total in rows:
+            while position < len(expected) and expected[position][0] <= day:
+                running = expected[position][1]
+                position += 1
+            if total != running:
+                drifted.append(user_id)
+                break
+    return drifted
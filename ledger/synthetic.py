@@ -0,0 +1,115 @@
+# ledger/synthetic.py
+"""Synthetic ledger history for benchmarks and local load testing.
+
+Rows are written with bulk_create, which sends no signals, so the
+denormalized expense totals are filled in here directly and the monthly
+rollups and the cumulative spend index are rebuilt afterwards.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from .models import Category, DailyLedger, Expense, DEFAULT_CATEGORY_DEFINITIONS
+from .rollups import rebuild_rollups
+from .spend_index import rebuild_spend_index
+
+
+SYNTHETIC_CATEGORIES = [title for title, _color in DEFAULT_CATEGORY_DEFINITIONS] + [
+    "Transport", "Groceries", "Utilities", "Coffee", "Leisure",
+]
+
+# Named sizes shared by seed_ledger and benchmark_ledger.
+SCALES = {
+    'small': {'users': 2, 'days': 90},
+    'medium': {'users': 5, 'days': 365},
+    'large': {'users': 20, 'days': 3 * 365},
+}
+
+DESCRIPTIONS = ["Lunch", "Bus fare", "Groceries", "Coffee", "Snacks", "Load", "Dinner", "Rent share"]
+
+
+def generate_history(user, start: date, days: int, rng: random.Random,
+                     max_expenses_per_day: int = 4, batch_size: int = 1000):
+    """Create `days` consecutive ledgers for a user starting at `start`.
+
+    Each day gets a base budget and up to max_expenses_per_day expenses.
+    Returns (ledger_count, expense_count).
+    """
+    Category.objects.bulk_create(
+        [Category(user=user, title=title) for title in SYNTHETIC_CATEGORIES],
+        ignore_conflicts=True,
+    )
+    categories = list(Category.objects.filter(user=user))
+
+    ledgers = []
+    planned = []
+    for offset in range(days):
+        base = Decimal(rng.choice((200, 300, 500, 800)))
+        prices = [Decimal(rng.randint(1000, 30000)) / 100 for _ in range(rng.randint(0, max_expenses_per_day))]
+        ledgers.append(DailyLedger(
+            user=user,
+            date=start + timedelta(days=offset),
+            base_budget=base,
+            expense_total=sum(prices, Decimal('0.00')),
+            expense_count=len(prices),
+        ))
+        planned.append(prices)
+
+    DailyLedger.objects.bulk_create(ledgers, batch_size=batch_size)
+    # Not every backend returns primary keys from bulk_create; look them up.
+    ids = dict(
+        DailyLedger.objects
+        .filter(user=user, date__gte=start, date__lt=start + timedelta(days=days))
+        .values_list('date', 'pk')
+    )
+
+    expense_count = 0
+    batch = []
+    for ledger, prices in zip(ledgers, planned):
+        for price in prices:
+            batch.append(Expense(
+                daily_ledger_id=ids[ledger.date],
+                category=rng.choice(categories) if rng.random() < 0.85 else None,
+                description=rng.choice(DESCRIPTIONS),
+                price=price,
+            ))
+        if len(batch) >= batch_size:
+            Expense.objects.bulk_create(batch, batch_size=batch_size)
+            expense_count += len(batch)
+            batch = []
+    if batch:
+        Expense.objects.bulk_create(batch, batch_size=batch_size)
+        expense_count += len(batch)
+
+    rebuild_rollups(user_ids=[user.pk])
+    rebuild_spend_index(user_ids=[user.pk])
+    return len(ledgers), expense_count
+
+
+def seed_users(count: int, days: int, seed: int, prefix: str = 'seed', end: date = None,
+               max_expenses_per_day: int = 4, password: str = 'seed'):
+    """Create `count` users, each with `days` of history ending at `end`.
+
+    Usernames are <prefix>-<n>. Each user draws from its own generator
+    derived from seed, so a user's history does not depend on how many
+    others are created. All share one precomputed password hash.
+    Returns (users, ledger_count, expense_count).
+    """
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    User = get_user_model()
+    hashed = make_password(password)
+    users = []
+    ledger_total = expense_total = 0
+    for index in range(count):
+        user = User.objects.create(username=f"{prefix}-{index}", password=hashed)
+        ledgers, expenses = generate_history(
+            user, start, days, random.Random(f"{seed}:{index}"), max_expenses_per_day=max_expenses_per_day,
+        )
+        users.append(user)
+        ledger_total += ledgers
+        expense_total += expenses
+    return users, ledger_total, expense_total
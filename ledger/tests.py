@@ -1,3 +1,1318 @@
-from django.test import TestCase
+import copy
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import Sum
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import user_generation
+from .carryover import CARRYOVER_HORIZON_DAYS, carry_into, propagate_carryover
+from .models import (
+    DEFAULT_CATEGORY_DEFINITIONS, Category, CumulativeSpend, DailyLedger, Expense, MonthlyCategoryRollup,
+    SavingsAccount, SavingsTransaction, UserProfile, ensure_default_categories_for_user,
+)
+from .importer import import_expenses, json_records
+from .middleware import QueryBudgetExceeded
+from .rollups import rebuild_rollups
+from .savings import SavingsError, deposit, withdraw
+from .spend_index import check_spend_index, spend_between
+from .utils import LedgerHTMLCalendar
+
+
+User = get_user_model()
+
+
+# Views over their query budget fail the test instead of only logging
+@override_settings(LEDGER_QUERY_BUDGET_STRICT=True)
+class LedgerTestCase(TestCase):
+    pass
+
+
+@override_settings(LEDGER_QUERY_BUDGET_STRICT=True)
+class LedgerTransactionTestCase(TransactionTestCase):
+    pass
+
+
+class ResetBudgetTests(LedgerTestCase):
+    # Reading the window, the bulk writes and the request overhead
+    # (session, user, ledger, messages) must fit regardless of horizon.
+    QUERY_CEILING = 12
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        self.client.force_login(self.user)
+        self.start = date(2025, 1, 10)
+
+    def _reset(self, day):
+        url = reverse("reset_budget", args=(day.year, day.month, day.day))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+        return len(ctx)
+
+    def _base(self, day):
+        # Stored, or else carried into on read
+        ledger = DailyLedger.objects.filter(user=self.user, date=day).first()
+        return ledger.base_budget if ledger else carry_into(self.user, day)
+
+    def test_reset_zeroes_following_days(self):
+        ledger = DailyLedger.objects.create(user=self.user, date=self.start, base_budget=Decimal("500.00"))
+        Expense.objects.create(daily_ledger=ledger, description="Lunch", price=Decimal("120.00"))
+        propagate_carryover(self.user, self.start)
+        self.assertEqual(self._base(self.start + timedelta(days=5)), Decimal("380.00"))
+        # Following days are derived, not stored
+        self.assertEqual(DailyLedger.objects.filter(user=self.user).count(), 1)
+
+        self._reset(self.start)
+
+        ledger.refresh_from_db()
+        self.assertEqual(ledger.base_budget, Decimal("120.00"))
+        self.assertTrue(ledger.is_manual_override)
+        for offset in range(1, CARRYOVER_HORIZON_DAYS + 1):
+            self.assertEqual(self._base(self.start + timedelta(days=offset)), Decimal("0.00"))
+
+    def test_reset_recomputes_past_days_with_expenses(self):
+        DailyLedger.objects.create(user=self.user, date=self.start, base_budget=Decimal("200.00"))
+        busy = DailyLedger.objects.create(user=self.user, date=self.start + timedelta(days=3), base_budget=Decimal("300.00"))
+        Expense.objects.create(daily_ledger=busy, description="Groceries", price=Decimal("100.00"))
+        manual = DailyLedger.objects.create(
+            user=self.user, date=self.start + timedelta(days=6), base_budget=Decimal("50.00"), is_manual_override=True,
+        )
+
+        self._reset(self.start)
+
+        # Days with expenses and manual days keep their base, but the days
+        # after them are still recomputed from their remaining.
+        self.assertEqual(self._base(busy.date), Decimal("300.00"))
+        self.assertEqual(self._base(busy.date + timedelta(days=1)), Decimal("200.00"))
+        self.assertEqual(self._base(manual.date), Decimal("50.00"))
+        self.assertEqual(self._base(manual.date + timedelta(days=1)), Decimal("50.00"))
+
+    def test_reset_query_count_is_bounded(self):
+        DailyLedger.objects.create(user=self.user, date=self.start, base_budget=Decimal("100.00"))
+        sparse = self._reset(self.start)
+
+        # A long populated history ahead of the reset date touches every day
+        # of the window, yet must not cost more queries.
+        other = date(2025, 6, 1)
+        for offset in range(2 * CARRYOVER_HORIZON_DAYS):
+            ledger = DailyLedger.objects.create(
+                user=self.user, date=other + timedelta(days=offset), base_budget=Decimal("100.00"),
+            )
+            if offset % 7 == 0:
+                Expense.objects.create(daily_ledger=ledger, description="Bus", price=Decimal("10.00"))
+        dense = self._reset(other)
+
+        self.assertLessEqual(sparse, self.QUERY_CEILING)
+        self.assertLessEqual(dense, self.QUERY_CEILING)
+
+
+class CarryoverWalkTests(LedgerTestCase):
+    """The bulk walk writes what a day-by-day loop over the same rows would."""
+    DAYS = 25
+
+    def _per_day(self, user, start, preserve):
+        remaining = DailyLedger.objects.get(user=user, date=start).remaining_budget
+        day = start
+        for _ in range(CARRYOVER_HORIZON_DAYS):
+            day += timedelta(days=1)
+            ledger = DailyLedger.objects.filter(user=user, date=day).first()
+            if ledger is None:
+                # Not stored: reads as carrying the remaining through
+                continue
+            if ledger.expense_count or ledger.is_manual_override:
+                break
+            if (ledger.base_budget < remaining) if preserve else (ledger.base_budget != remaining):
+                ledger.base_budget = remaining
+                ledger.save(update_fields=["base_budget"])
+            remaining = ledger.remaining_budget
+
+    def _history(self, rng, users):
+        first = date(2025, 3, 1)
+        for offset in range(self.DAYS):
+            if offset and rng.random() < 0.2:
+                continue
+            base = Decimal(rng.randrange(0, 120))
+            manual = offset > 0 and rng.random() < 0.1
+            price = Decimal(rng.randrange(1, 50)) if offset == 0 or rng.random() < 0.15 else None
+            for user in users:
+                ledger = DailyLedger.objects.create(
+                    user=user, date=first + timedelta(days=offset), base_budget=base, is_manual_override=manual,
+                )
+                if price is not None:
+                    Expense.objects.create(daily_ledger=ledger, description="Item", price=price)
+        return first
+
+    def _bases(self, user):
+        return list(DailyLedger.objects.filter(user=user).order_by("date").values_list("date", "base_budget"))
+
+    def test_bulk_walk_matches_per_day_loop(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                bulk = User.objects.create(username=f"bulk-{seed}")
+                loop = User.objects.create(username=f"loop-{seed}")
+                first = self._history(rng, [bulk, loop])
+                preserve = rng.random() < 0.5
+
+                with CaptureQueriesContext(connection) as queries:
+                    propagate_carryover(bulk, first, preserve_manual_increases=preserve)
+                self._per_day(loop, first, preserve)
+
+                self.assertLessEqual(len(queries), 5)
+                self.assertEqual(
+                    [base for _day, base in self._bases(bulk)], [base for _day, base in self._bases(loop)],
+                )
+
+
+class DailyLedgerMemoTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dora", password="pw")
+        self.ledger = DailyLedger.objects.create(user=self.user, date=date(2025, 4, 1), base_budget=Decimal("100.00"))
+        Expense.objects.create(daily_ledger=self.ledger, description="Lunch", price=Decimal("60.00"))
+
+    def test_derived_figures_read_nothing_more(self):
+        ledger = DailyLedger.objects.get(pk=self.ledger.pk)
+        with self.assertNumQueries(0):
+            figures = (ledger.status, ledger.remaining_budget, ledger.budget_usage_percentage, ledger.daily_savings)
+        self.assertEqual(figures, ("Balanced", Decimal("40.00"), Decimal("60"), Decimal("40.00")))
+
+        ledger.base_budget = Decimal("200.00")
+        with self.assertNumQueries(0):
+            self.assertEqual((ledger.status, ledger.remaining_budget), ("Underspent", Decimal("140.00")))
+
+    def test_expense_changes_invalidate_the_loaded_parent(self):
+        ledger = DailyLedger.objects.get(pk=self.ledger.pk)
+        self.assertEqual(ledger.status, "Balanced")
+
+        expense = Expense.objects.create(daily_ledger=ledger, description="Dinner", price=Decimal("40.00"))
+        self.assertEqual((ledger.total_expenses, ledger.status), (Decimal("100.00"), "Overspent"))
+
+        expense.delete()
+        self.assertEqual((ledger.total_expenses, ledger.remaining_budget), (Decimal("60.00"), Decimal("40.00")))
+
+    def test_delta_is_seen_after_invalidate_totals(self):
+        ledger = DailyLedger.objects.get(pk=self.ledger.pk)
+        self.assertEqual(ledger.remaining_budget, Decimal("40.00"))
+
+        DailyLedger.apply_expense_delta(ledger.pk, Decimal("15.00"), 1)
+        # The instance keeps what it read until told otherwise
+        self.assertEqual(ledger.remaining_budget, Decimal("40.00"))
+        ledger.invalidate_totals()
+        with self.assertNumQueries(1):
+            self.assertEqual((ledger.remaining_budget, ledger.expense_count), (Decimal("25.00"), 2))
+
+    def test_with_totals_annotates_the_live_sum(self):
+        DailyLedger.objects.filter(pk=self.ledger.pk).update(expense_total=Decimal("0.00"))
+
+        ledger = DailyLedger.objects.with_totals().get(pk=self.ledger.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((ledger.total_expenses, ledger.status), (Decimal("60.00"), "Balanced"))
+
+
+class CalendarHeatmapTests(LedgerTestCase):
+    def _cell(self, html, day):
+        start = html.index(f'data-day="{day}" ')
+        return html[start:html.index("</td>", start)]
+
+    def test_cells_carry_status_and_spend(self):
+        html = LedgerHTMLCalendar({
+            date(2025, 5, 3): (Decimal("1234.50"), Decimal("2000.00"), "Balanced"),
+            date(2025, 5, 4): (Decimal("0.00"), Decimal("100.00"), "Underspent"),
+        }).formatmonth(2025, 5)
+
+        self.assertEqual(
+            self._cell(html, 3),
+            'data-day="3" class="calendar-day-link past-day status-balanced has-spend">3'
+            '<span class="day-spend">₱1,234.50</span></a>',
+        )
+        self.assertEqual(self._cell(html, 4), 'data-day="4" class="calendar-day-link past-day status-underspent">4</a>')
+        self.assertEqual(self._cell(html, 5), 'data-day="5" class="calendar-day-link past-day">5</a>')
+
+    def test_calendar_page_renders_the_month_heatmap(self):
+        caches["default"].clear()
+        user = User.objects.create_user(username="hugo", password="pw")
+        self.client.force_login(user)
+        ledger = DailyLedger.objects.create(user=user, date=date(2025, 5, 2), base_budget=Decimal("100.00"))
+        Expense.objects.create(daily_ledger=ledger, description="Groceries", price=Decimal("120.00"))
+        DailyLedger.objects.create(user=user, date=date(2025, 5, 20), base_budget=Decimal("50.00"))
+
+        html = self.client.get(reverse("calendar_view", args=(2025, 5))).content.decode()
+
+        self.assertIn('status-overspent has-spend">2<span class="day-spend">₱120.00</span>', self._cell(html, 2))
+        # Carried into from the 20th, without a stored row
+        self.assertIn("status-underspent", self._cell(html, 21))
+        self.assertNotIn("status-", self._cell(html, 1))
+
+
+class DefaultCategoryTests(LedgerTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.user = User.objects.create_user(username="ivan", password="pw")
+        self.defaults = sorted(title for title, _color in DEFAULT_CATEGORY_DEFINITIONS)
+
+    def _titles(self):
+        return sorted(Category.objects.filter(user=self.user).values_list("title", flat=True))
+
+    def test_signup_seeds_once_and_later_calls_are_free(self):
+        self.assertEqual(self._titles(), self.defaults)
+        with self.assertNumQueries(1):
+            ensure_default_categories_for_user(self.user)
+        # The cache marker is set now
+        with self.assertNumQueries(0):
+            ensure_default_categories_for_user(self.user)
+        self.assertEqual(self._titles(), self.defaults)
+
+    def test_cleared_marker_falls_back_to_the_profile_flag(self):
+        ensure_default_categories_for_user(self.user)
+        Category.objects.filter(user=self.user, title=self.defaults[0]).delete()
+
+        caches["default"].clear()
+        ensure_default_categories_for_user(self.user)
+        # Seeded before, so a deleted default stays deleted
+        self.assertEqual(self._titles(), self.defaults[1:])
+
+        caches["default"].clear()
+        UserProfile.objects.filter(user=self.user).update(default_categories_seeded=False)
+        ensure_default_categories_for_user(self.user)
+        self.assertEqual(self._titles(), self.defaults)
+        ensure_default_categories_for_user(self.user)
+        self.assertEqual(Category.objects.filter(user=self.user).count(), len(self.defaults))
+
+
+class MonthlyRollupTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="pw")
+        self.food = Category.objects.create(user=self.user, title="Food")
+        self.fare = Category.objects.create(user=self.user, title="Fare")
+        self.march = DailyLedger.objects.create(user=self.user, date=date(2025, 3, 31))
+        self.april = DailyLedger.objects.create(user=self.user, date=date(2025, 4, 1))
+
+    def _rollups(self):
+        return sorted(
+            MonthlyCategoryRollup.objects
+            .filter(user=self.user)
+            .values_list('year', 'month', 'category__title', 'total', 'count'),
+            key=str,
+        )
+
+    def _assert_matches_rebuild(self):
+        incremental = self._rollups()
+        rebuild_rollups(user_ids=[self.user.pk])
+        self.assertEqual(incremental, self._rollups())
+        return incremental
+
+    def test_create_edit_and_delete_keep_rollups_in_sync(self):
+        lunch = Expense.objects.create(daily_ledger=self.march, category=self.food, description="Lunch", price=Decimal("80.00"))
+        Expense.objects.create(daily_ledger=self.march, category=self.food, description="Dinner", price=Decimal("20.00"))
+        bus = Expense.objects.create(daily_ledger=self.march, description="Bus", price=Decimal("15.00"))
+        self.assertEqual(self._assert_matches_rebuild(), [
+            (2025, 3, "Food", Decimal("100.00"), 2),
+            (2025, 3, None, Decimal("15.00"), 1),
+        ])
+
+        lunch = Expense.objects.get(pk=lunch.pk)
+        lunch.price = Decimal("90.00")
+        lunch.save()
+        bus = Expense.objects.get(pk=bus.pk)
+        bus.category = self.fare
+        bus.daily_ledger = self.april
+        bus.save()
+        self.assertEqual(self._assert_matches_rebuild(), [
+            (2025, 3, "Food", Decimal("110.00"), 2),
+            (2025, 4, "Fare", Decimal("15.00"), 1),
+        ])
+
+        bus.delete()
+        self.assertEqual(self._assert_matches_rebuild(), [(2025, 3, "Food", Decimal("110.00"), 2)])
+
+    def test_deleting_category_moves_totals_to_uncategorized(self):
+        Expense.objects.create(daily_ledger=self.march, category=self.food, description="Lunch", price=Decimal("80.00"))
+        Expense.objects.create(daily_ledger=self.march, description="Bus", price=Decimal("15.00"))
+
+        self.food.delete()
+
+        self.assertEqual(self._assert_matches_rebuild(), [(2025, 3, None, Decimal("95.00"), 2)])
+
+    def test_monthly_summary_reads_rollups(self):
+        Expense.objects.create(daily_ledger=self.march, category=self.food, description="Lunch", price=Decimal("75.00"))
+        Expense.objects.create(daily_ledger=self.march, description="Bus", price=Decimal("25.00"))
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("monthly_summary", args=(2025, 3)))
+
+        self.assertEqual(response.context["month_total"], Decimal("100.00"))
+        rows = [(row["title"], row["total"], row["percent"]) for row in response.context["summary_rows"]]
+        self.assertEqual(rows, [("Food", Decimal("75.00"), Decimal("75")), ("Uncategorized", Decimal("25.00"), Decimal("25"))])
+
+
+class YearSummaryTests(LedgerTestCase):
+    def setUp(self):
+        # Year payloads of an earlier test's user with the same id stay cached
+        caches["default"].clear()
+        self.user = User.objects.create_user(username="carol", password="pw")
+        self.client.force_login(self.user)
+        food = Category.objects.create(user=self.user, title="Food")
+        # Two underspent days in a row, a gap, then balanced and overspent
+        spend = {
+            date(2025, 1, 1): ("100.00", "10.00"),
+            date(2025, 1, 2): ("90.00", "20.00"),
+            date(2025, 1, 5): ("100.00", "60.00"),
+            date(2025, 2, 1): ("50.00", "80.00"),
+        }
+        for day, (base, price) in spend.items():
+            ledger = DailyLedger.objects.create(user=self.user, date=day, base_budget=Decimal(base))
+            Expense.objects.create(daily_ledger=ledger, category=food, description="Meal", price=Decimal(price))
+
+    def test_year_summary_figures(self):
+        response = self.client.get(reverse("get_year_summary", args=(2025,)))
+        summary = response.json()
+
+        self.assertEqual(summary["total"], 170.0)
+        self.assertEqual(summary["month_totals"][:3], [90.0, 80.0, 0.0])
+        self.assertEqual([c["title"] for c in summary["categories"]], ["Food"])
+        self.assertEqual(summary["days"]["percentiles"]["p50"], 40.0)
+        self.assertEqual(summary["statuses"]["Underspent"]["days"], 2)
+        self.assertEqual(summary["statuses"]["Underspent"]["longest_streak"], 2)
+        self.assertEqual(summary["statuses"]["Balanced"]["streak_start"], "2025-01-05")
+        self.assertEqual(summary["statuses"]["Overspent"]["days"], 1)
+        # January: 100 opening budget, the second day carried 90 over and
+        # 70 carried through the gap, so the 5th's 100 adds 30.
+        self.assertEqual(summary["flow"][0], {"month": 1, "added": 130.0, "spent": 90.0, "carried": 40.0})
+
+        page = self.client.get(reverse("year_summary", args=(2025,)))
+        self.assertContains(page, "Year in Review")
+
+    def test_savings_balance_is_the_one_at_year_end(self):
+        deposit(self.user, Decimal("40"))
+        SavingsTransaction.objects.filter(account__user=self.user).update(
+            created_at=timezone.make_aware(datetime(2024, 12, 31, 23, 0)),
+        )
+        deposit(self.user, Decimal("10"))
+
+        earlier = self.client.get(reverse("get_year_summary", args=(2024,))).json()
+        self.assertEqual(earlier["savings_balance"], 40.0)
+        this_year = timezone.now().year
+        self.assertEqual(self.client.get(reverse("get_year_summary", args=(this_year,))).json()["savings_balance"], 50.0)
+
+    def test_carry_from_previous_year_is_not_counted_as_added(self):
+        december = DailyLedger.objects.create(user=self.user, date=date(2024, 12, 31), base_budget=Decimal("100.00"))
+        Expense.objects.create(daily_ledger=december, description="Snack", price=Decimal("30.00"))
+
+        previous = self.client.get(reverse("get_year_summary", args=(2024,))).json()
+        self.assertEqual(previous["flow"][11]["carried"], 70.0)
+        # The 70 left on Dec 31 carries into Jan 1, whose 100 adds only 30
+        summary = self.client.get(reverse("get_year_summary", args=(2025,))).json()
+        self.assertEqual(summary["flow"][0]["added"], 60.0)
+
+
+class SavingsConcurrencyTests(LedgerTransactionTestCase):
+    THREADS = 8
+    ATTEMPTS = 10
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="dave", password="pw")
+        deposit(self.user, Decimal("50"))
+        self.day = date(2025, 5, 1)
+
+    def _hammer(self, action):
+        outcomes = []
+
+        def worker():
+            try:
+                for _ in range(self.ATTEMPTS):
+                    try:
+                        action()
+                        outcomes.append(True)
+                    except SavingsError:
+                        outcomes.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_parallel_withdrawals_never_overdraw_or_lose_updates(self):
+        outcomes = self._hammer(lambda: withdraw(self.user, Decimal("1.00"), self.day))
+
+        self.assertEqual(len(outcomes), self.THREADS * self.ATTEMPTS)
+        self.assertEqual(outcomes.count(True), 50)
+        self.assertEqual(SavingsAccount.objects.get(user=self.user).balance, Decimal("0.00"))
+        self._assert_journal_chains(51)
+        ledger = DailyLedger.objects.get(user=self.user, date=self.day)
+        self.assertEqual(ledger.base_budget, Decimal("50.00"))
+        self.assertTrue(ledger.is_manual_override)
+
+    def test_parallel_deposits_are_all_counted(self):
+        outcomes = self._hammer(lambda: deposit(self.user, Decimal("2")))
+
+        self.assertTrue(all(outcomes))
+        expected = Decimal("50.00") + 2 * self.THREADS * self.ATTEMPTS
+        self.assertEqual(SavingsAccount.objects.get(user=self.user).balance, expected)
+        self._assert_journal_chains(1 + self.THREADS * self.ATTEMPTS)
+
+    def _assert_journal_chains(self, entries):
+        journal = SavingsTransaction.objects.filter(account__user=self.user).order_by('id')
+        running = Decimal("0.00")
+        for entry in journal:
+            running += entry.amount
+            self.assertEqual(entry.balance_after, running)
+        self.assertEqual(journal.count(), entries)
+        self.assertEqual(running, SavingsAccount.objects.get(user=self.user).balance)
+
+
+class SavingsJournalTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erin", password="pw")
+        self.client.force_login(self.user)
+
+    def test_history_is_keyset_paginated(self):
+        for amount in range(1, 31):
+            deposit(self.user, Decimal(amount))
+
+        first = self.client.get(reverse("savings_history"))
+        entries = first.context["entries"]
+        self.assertEqual([e.amount for e in entries][:2], [Decimal("30.00"), Decimal("29.00")])
+        self.assertEqual(len(entries), 25)
+
+        second = self.client.get(first.context["older_url"])
+        self.assertEqual([e.amount for e in second.context["entries"]], [Decimal(n) for n in range(5, 0, -1)])
+        self.assertIsNone(second.context["older_url"])
+
+    def test_history_without_account_writes_nothing(self):
+        SavingsAccount.objects.filter(user=self.user).delete()
+        generation = user_generation(self.user)
+
+        response = self.client.get(reverse("savings_history"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["entries"]), [])
+        self.assertFalse(SavingsAccount.objects.filter(user=self.user).exists())
+        self.assertEqual(user_generation(self.user), generation)
+
+    def test_reconcile_detects_and_fixes_drift(self):
+        deposit(self.user, Decimal("40"))
+        withdraw(self.user, Decimal("15.00"), date(2025, 2, 1))
+        out = io.StringIO()
+        call_command("reconcile_savings", stdout=out)
+        self.assertIn("All 1 accounts match", out.getvalue())
+        account = SavingsAccount.objects.get(user=self.user)
+        self.assertEqual(account.journal_checkpoint_balance, Decimal("25.00"))
+
+        SavingsAccount.objects.filter(user=self.user).update(balance=Decimal("99.00"))
+        out = io.StringIO()
+        call_command("reconcile_savings", "--fix", stdout=out)
+        self.assertIn("Corrected 1 of 1", out.getvalue())
+        self.assertEqual(SavingsAccount.objects.get(user=self.user).balance, Decimal("25.00"))
+
+
+class ReconcileExpenseTotalsTests(LedgerTestCase):
+    def test_fix_invalidates_cache_and_re_carries_later_days(self):
+        user = User.objects.create_user(username="rita", password="pw")
+        first = DailyLedger.objects.create(user=user, date=date(2025, 6, 1), base_budget=Decimal("100.00"))
+        Expense.objects.create(daily_ledger=first, description="Lunch", price=Decimal("30.00"))
+        second = DailyLedger.objects.create(user=user, date=date(2025, 6, 2), base_budget=Decimal("100.00"))
+        # Drift: the first day's total was lost and the next day carried it
+        DailyLedger.objects.filter(pk=first.pk).update(expense_total=Decimal("0.00"), expense_count=0)
+        generation = user_generation(user)
+
+        out = io.StringIO()
+        call_command("reconcile_expense_totals", "--fix", stdout=out)
+
+        self.assertIn("Repaired 1 of 2", out.getvalue())
+        self.assertEqual(DailyLedger.objects.get(pk=first.pk).expense_total, Decimal("30.00"))
+        self.assertEqual(DailyLedger.objects.get(pk=second.pk).base_budget, Decimal("70.00"))
+        self.assertGreater(user_generation(user), generation)
+
+
+class ExportTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="frank", password="pw")
+        self.client.force_login(self.user)
+        food = Category.objects.create(user=self.user, title="Food")
+        busy = DailyLedger.objects.create(user=self.user, date=date(2025, 3, 1), base_budget=Decimal("200.00"))
+        Expense.objects.create(daily_ledger=busy, category=food, description="Lunch, late", price=Decimal("45.50"))
+        Expense.objects.create(daily_ledger=busy, description="Bus", price=Decimal("12.00"))
+        DailyLedger.objects.create(user=self.user, date=date(2025, 3, 2), base_budget=Decimal("142.50"))
+
+    def _export(self, **params):
+        response = self.client.get(reverse("export_history"), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_includes_expenses_and_empty_days(self):
+        _response, body = self._export(format="csv")
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0][:4], ["date", "base_budget", "manual_override", "day_total"])
+        self.assertEqual([(r[0], r[5], r[6], r[7]) for r in rows[1:]], [
+            ("2025-03-01", "Lunch, late", "Food", "45.50"),
+            ("2025-03-01", "Bus", "", "12.00"),
+            ("2025-03-02", "", "", ""),
+        ])
+
+    def test_ndjson_gzip(self):
+        response, body = self._export(format="ndjson", gzip="1")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        records = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual([r["price"] for r in records], ["45.50", "12.00", None])
+        self.assertEqual(records[0]["day_total"], "57.50")
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("export_history"), {"format": "xml"}).status_code, 400)
+
+
+class ImportTests(LedgerTestCase):
+    CSV = (
+        "date,description,price,category\n"
+        "2025-04-01,Lunch,50.00,Food\n"
+        "2025-04-01,Bus,10.00,\n"
+        "2025-04-03,Dinner,70.00,Food\n"
+        "04/05/2025,Broken,1.00,\n"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="gina", password="pw")
+        self.client.force_login(self.user)
+
+    def test_csv_import_updates_totals_rollups_and_carryover(self):
+        DailyLedger.objects.create(user=self.user, date=date(2025, 3, 31), base_budget=Decimal("300.00"))
+        upload = SimpleUploadedFile("expenses.csv", self.CSV.encode())
+
+        response = self.client.post(reverse("import_history"), {"file": upload})
+
+        self.assertRedirects(response, reverse("user_settings"), fetch_redirect_response=False)
+        self.assertEqual(Expense.objects.filter(daily_ledger__user=self.user).count(), 3)
+        first = DailyLedger.objects.get(user=self.user, date=date(2025, 4, 1))
+        self.assertEqual((first.expense_total, first.expense_count), (Decimal("60.00"), 2))
+        # 300 carried into the 1st; 240 passes through the (unstored) 2nd to the 3rd
+        self.assertEqual(first.base_budget, Decimal("300.00"))
+        self.assertFalse(DailyLedger.objects.filter(user=self.user, date=date(2025, 4, 2)).exists())
+        self.assertEqual(carry_into(self.user, date(2025, 4, 2)), Decimal("240.00"))
+        self.assertEqual(DailyLedger.objects.get(user=self.user, date=date(2025, 4, 3)).base_budget, Decimal("240.00"))
+        rollups = dict(
+            MonthlyCategoryRollup.objects.filter(user=self.user, year=2025, month=4)
+            .values_list("category__title", "total")
+        )
+        self.assertEqual(rollups, {"Food": Decimal("120.00"), None: Decimal("10.00")})
+        self.assertEqual(Category.objects.filter(user=self.user, title="Food").count(), 1)
+
+    def test_json_array_round_trips_the_export(self):
+        source = User.objects.create_user(username="hank", password="pw")
+        ledger = DailyLedger.objects.create(user=source, date=date(2025, 5, 1), base_budget=Decimal("90.00"))
+        Expense.objects.create(daily_ledger=ledger, description="Tea", price=Decimal("15.25"))
+        self.client.force_login(source)
+        exported = b"".join(self.client.get(reverse("export_history"), {"format": "ndjson"}).streaming_content)
+        records = "[" + ",".join(exported.decode().splitlines()) + "]"
+
+        result = import_expenses(self.user, json_records(io.StringIO(records)), batch_size=2)
+
+        self.assertEqual((result.expenses, result.skipped), (1, 0))
+        imported = DailyLedger.objects.get(user=self.user, date=date(2025, 5, 1))
+        self.assertEqual((imported.base_budget, imported.expense_total), (Decimal("90.00"), Decimal("15.25")))
+
+
+class RollOverTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ivy", password="pw")
+        ledger = DailyLedger.objects.create(user=self.user, date=date(2025, 6, 1), base_budget=Decimal("100.00"))
+        Expense.objects.create(daily_ledger=ledger, description="Lunch", price=Decimal("30.00"))
+
+    def _roll(self, *args):
+        out = io.StringIO()
+        call_command("roll_over_budgets", "--date", "2025-06-03", "--workers", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_stores_missing_day_only_when_asked(self):
+        idle = User.objects.create_user(username="jack", password="pw")
+
+        self.assertIn("0 days created", self._roll())
+        self.assertIn("1 days created", self._roll("--materialize"))
+
+        days = DailyLedger.objects.filter(user=self.user, date__gt=date(2025, 6, 1))
+        self.assertEqual([(d.date, d.base_budget) for d in days], [(date(2025, 6, 3), Decimal("70.00"))])
+        self.assertFalse(DailyLedger.objects.filter(user=idle).exists())
+        # Running again changes nothing
+        self.assertIn("0 days created, 0 corrected", self._roll("--materialize"))
+
+    def test_corrects_stale_day_but_keeps_manual_budget(self):
+        DailyLedger.objects.create(user=self.user, date=date(2025, 6, 2), base_budget=Decimal("70.00"))
+        stale = DailyLedger.objects.create(user=self.user, date=date(2025, 6, 3), base_budget=Decimal("5.00"))
+        other = User.objects.create_user(username="kim", password="pw")
+        DailyLedger.objects.create(user=other, date=date(2025, 6, 2), base_budget=Decimal("50.00"))
+        manual = DailyLedger.objects.create(
+            user=other, date=date(2025, 6, 3), base_budget=Decimal("500.00"), is_manual_override=True,
+        )
+
+        self.assertIn("1 corrected", self._roll("--chunk-size", "1"))
+
+        stale.refresh_from_db()
+        manual.refresh_from_db()
+        self.assertEqual(stale.base_budget, Decimal("70.00"))
+        self.assertEqual(manual.base_budget, Decimal("500.00"))
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("daily_view_date", args=(2025, 6, 3)))
+        writes = [q["sql"] for q in queries if q["sql"].startswith(("INSERT", "UPDATE")) and "ledger_dailyledger" in q["sql"]]
+        self.assertEqual(writes, [])
+
+
+class CachedPayloadInvalidationTests(LedgerTestCase):
+    """Every kind of change must reach the next response despite the cache."""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.user = User.objects.create_user(username="cora", password="pw")
+        self.client.force_login(self.user)
+        self.day = DailyLedger.objects.create(user=self.user, date=date(2025, 6, 1), base_budget=Decimal("100.00"))
+        self.day_url = reverse("daily_view_date", args=(2025, 6, 1))
+
+    def _june_1(self):
+        return self.client.get(reverse("get_month_summary", args=(2025, 6))).json()["days"]["1"]
+
+    def test_expense_changes_reach_cached_pages(self):
+        self.assertEqual(self._june_1()["total_expenses"], 0)
+        self.assertEqual(list(self.client.get(self.day_url).context["expenses"]), [])
+
+        self.client.post(self.day_url, {"description": "Lunch", "price": "30"})
+        self.assertEqual(self._june_1()["total_expenses"], 30.0)
+        expense = Expense.objects.get(daily_ledger=self.day)
+        self.assertEqual(list(self.client.get(self.day_url).context["expenses"]), [expense])
+
+        expense.price = Decimal("45.00")
+        expense.save()
+        self.assertEqual(self._june_1()["total_expenses"], 45.0)
+        self.assertEqual(self.client.get(self.day_url).context["expenses"][0].price, Decimal("45.00"))
+
+        self.client.post(reverse("delete_expense", args=(expense.pk,)))
+        self.assertEqual(self._june_1()["total_expenses"], 0)
+        self.assertEqual(list(self.client.get(self.day_url).context["expenses"]), [])
+
+    def test_budget_changes_reach_cached_pages(self):
+        self.assertEqual(self._june_1()["effective_budget"], 100.0)
+
+        self.client.post(reverse("update_budget", args=(2025, 6, 1)), {"new_base_budget": "80"})
+        self.assertEqual(self._june_1()["effective_budget"], 80.0)
+
+        self.client.post(reverse("reset_budget", args=(2025, 6, 1)))
+        self.assertEqual(self._june_1()["effective_budget"], 0)
+
+    def test_category_changes_reach_cached_pages(self):
+        self.assertNotIn("Travel", self.client.get(self.day_url).context["category_titles"])
+
+        travel = Category.objects.create(user=self.user, title="Travel")
+        self.assertIn("Travel", self.client.get(self.day_url).context["category_titles"])
+
+        travel.delete()
+        self.assertNotIn("Travel", self.client.get(self.day_url).context["category_titles"])
+
+    def test_savings_changes_reach_cached_pages(self):
+        self.client.post(reverse("update_savings"), {"action": "add", "amount": "50", "current_date": "2025-06-01"})
+        self.assertEqual(self.client.get(self.day_url).context["savings_account"].balance, Decimal("50.00"))
+        self.assertEqual(self._june_1()["effective_budget"], 100.0)
+
+        self.client.post(reverse("update_savings"), {"action": "withdraw", "amount": "20", "current_date": "2025-06-01"})
+        self.assertEqual(self._june_1()["effective_budget"], 120.0)
+        self.assertEqual(self.client.get(self.day_url).context["savings_account"].balance, Decimal("30.00"))
+
+
+class ConditionalGetTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="gale", password="pw")
+        self.client.force_login(self.user)
+        self.url = reverse("daily_view_date", args=(2025, 6, 1))
+
+    def _revalidate(self, etag):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_is_not_modified_until_data_changes(self):
+        first = self.client.get(self.url)
+        self.assertNotIn("Last-Modified", first)
+        self.assertEqual(self._revalidate(first["ETag"]).status_code, 304)
+
+        deposit(self.user, Decimal("5"))
+
+        self.assertEqual(self._revalidate(first["ETag"]).status_code, 200)
+
+    def test_new_release_is_not_answered_with_stale_page(self):
+        with override_settings(LEDGER_RELEASE="release-1"):
+            etag = self.client.get(self.url)["ETag"]
+            self.assertEqual(self._revalidate(etag).status_code, 304)
+
+        with override_settings(LEDGER_RELEASE="release-2"):
+            self.assertEqual(self._revalidate(etag).status_code, 200)
+
+    def test_username_change_is_not_answered_with_stale_page(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.client.post(reverse("user_settings"), {"action": "update_profile", "username": "gale2"}, follow=True)
+
+        response = self._revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "gale2")
+
+
+class DailyViewReadTests(LedgerTestCase):
+    MAX_SELECTS = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="lena", password="pw")
+        self.client.force_login(self.user)
+        ledger = DailyLedger.objects.create(user=self.user, date=date(2025, 7, 1), base_budget=Decimal("100.00"))
+        Expense.objects.create(daily_ledger=ledger, description="Lunch", price=Decimal("40.00"))
+
+    def test_get_writes_nothing_and_shows_carry(self):
+        url = reverse("daily_view_date", args=(2025, 7, 3))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["ledger"].base_budget, Decimal("60.00"))
+        statements = [q["sql"].split(None, 1)[0].upper() for q in queries]
+        self.assertEqual([s for s in statements if s in ("INSERT", "UPDATE", "DELETE")], [])
+        self.assertLessEqual(statements.count("SELECT"), self.MAX_SELECTS, [q["sql"] for q in queries])
+        self.assertFalse(DailyLedger.objects.filter(user=self.user, date__gt=date(2025, 7, 1)).exists())
+
+    def test_day_expenses_and_categories_load_once(self):
+        ledger = DailyLedger.objects.get(user=self.user, date=date(2025, 7, 1))
+        for index in range(5):
+            category = Category.objects.create(user=self.user, title=f"Cat {index}")
+            Expense.objects.create(daily_ledger=ledger, category=category, description="Item", price=Decimal("1.00"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("daily_view_date", args=(2025, 7, 1)))
+
+        tables = [q["sql"].split(" FROM ", 1)[1].split()[0] for q in queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(tables.count('"ledger_expense"'), 1)
+        self.assertEqual(tables.count('"ledger_category"'), 1)
+        self.assertEqual(response.context["category_titles"][:2], ["Cat 0", "Cat 1"])
+        self.assertEqual(
+            [row["category__title"] for row in response.context["expenses_by_category"]],
+            [None, "Cat 0", "Cat 1", "Cat 2", "Cat 3", "Cat 4"],
+        )
+        self.assertContains(response, "Cat 4")
+
+    def test_month_and_day_summaries_include_carried_days(self):
+        days = self.client.get(reverse("get_month_summary", args=(2025, 7))).json()["days"]
+
+        self.assertEqual(sorted(days, key=int), [str(day) for day in range(1, 32)])
+        self.assertEqual(days["20"]["effective_budget"], 60.0)
+        summary = self.client.get(reverse("get_day_summary"), {"year": 2025, "month": 8, "day": 29}).json()
+        self.assertEqual(summary["effective_budget"], 60.0)
+        # Beyond the carryover horizon nothing is carried
+        summary = self.client.get(reverse("get_day_summary"), {"year": 2025, "month": 8, "day": 31}).json()
+        self.assertEqual(summary["status"], "No data")
+        self.assertEqual(DailyLedger.objects.filter(user=self.user).count(), 1)
+
+    def test_first_expense_persists_the_shown_carry(self):
+        url = reverse("daily_view_date", args=(2025, 7, 3))
+        self.client.post(url, {"description": "Tea", "price": "5.00"})
+
+        day = DailyLedger.objects.get(user=self.user, date=date(2025, 7, 3))
+        self.assertEqual((day.base_budget, day.expense_total), (Decimal("60.00"), Decimal("5.00")))
+
+
+class BudgetWriteTests(LedgerTestCase):
+    """Reads no longer correct stored days, so every write must leave them right."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="mira", password="pw")
+        self.client.force_login(self.user)
+
+    def _day(self, day):
+        return DailyLedger.objects.get(user=self.user, date=date(2025, 8, day))
+
+    def _spend(self, day, price):
+        self.client.post(reverse("daily_view_date", args=(2025, 8, day)), {"description": "Item", "price": price})
+
+    def test_budget_update_reaches_the_stored_days_after_it(self):
+        DailyLedger.objects.create(user=self.user, date=date(2025, 8, 1), base_budget=Decimal("100.00"))
+        DailyLedger.objects.create(user=self.user, date=date(2025, 8, 2), base_budget=Decimal("100.00"))
+
+        self.client.post(reverse("update_budget", args=(2025, 8, 1)), {"new_base_budget": "50"})
+
+        self.assertEqual(self._day(2).base_budget, Decimal("50.00"))
+
+    def test_deleting_last_expense_returns_day_to_its_carry(self):
+        DailyLedger.objects.create(
+            user=self.user, date=date(2025, 8, 5), base_budget=Decimal("1000.00"), is_manual_override=True,
+        )
+        self._spend(5, "10")
+        self._spend(9, "20")
+        # The walk stops at the 9th, which has expenses, so it keeps 990
+        self._spend(5, "5")
+        self.assertEqual(self._day(9).base_budget, Decimal("990.00"))
+
+        expense = Expense.objects.get(daily_ledger=self._day(9))
+        self.client.post(reverse("delete_expense", args=(expense.pk,)))
+
+        self.assertEqual(self._day(9).base_budget, Decimal("985.00"))
+        self.assertEqual(carry_into(self.user, date(2025, 8, 10)), Decimal("985.00"))
+
+
+class EagerLedger:
+    """The carryover model before days were derived on read, kept in memory.
+
+    Every view stored the day, corrected it from the stored day before it
+    and walked the carry forward, creating each day it reached. Writes
+    happen from the day's page, so each one follows a view of that day.
+    """
+    HORIZON = 60
+
+    def __init__(self):
+        self.days = {}
+
+    def _day(self, day):
+        return self.days.setdefault(day, {"base": Decimal("0.00"), "manual": False, "spent": []})
+
+    def _remaining(self, ledger):
+        return max(ledger["base"] - sum(ledger["spent"], Decimal("0.00")), Decimal("0.00"))
+
+    def _propagate(self, start, preserve):
+        current = start
+        for _ in range(self.HORIZON):
+            if current not in self.days:
+                break
+            remaining = self._remaining(self.days[current])
+            current += timedelta(days=1)
+            following = self._day(current)
+            if following["spent"] or following["manual"]:
+                break
+            if (following["base"] < remaining) if preserve else (following["base"] != remaining):
+                following["base"] = remaining
+            if remaining <= 0:
+                break
+
+    def shown(self, day):
+        """The budget a view of the day shows, without storing anything."""
+        ledger = self.days.get(day, {"base": Decimal("0.00"), "manual": False, "spent": []})
+        before = self.days.get(day - timedelta(days=1))
+        if before is not None and not ledger["manual"] and not ledger["spent"]:
+            return self._remaining(before)
+        return ledger["base"]
+
+    def view(self, day):
+        ledger = self._day(day)
+        ledger["base"] = self.shown(day)
+        self._propagate(day, True)
+        return ledger
+
+    def spend(self, day, price):
+        ledger = self.view(day)
+        if price > self._remaining(ledger) or self._remaining(ledger) <= 0:
+            return False
+        ledger["spent"].append(price)
+        self._propagate(day, False)
+        return True
+
+    def delete(self, day, price):
+        self.days[day]["spent"].remove(price)
+        self._propagate(day, False)
+
+    def update_budget(self, day, amount):
+        ledger = self.view(day)
+        ledger["base"], ledger["manual"] = amount, True
+
+    def reset(self, day):
+        ledger = self.view(day)
+        ledger["base"], ledger["manual"] = sum(ledger["spent"], Decimal("0.00")), True
+        for offset in range(self.HORIZON):
+            self._propagate(day + timedelta(days=offset), False)
+
+    def withdraw(self, day, amount):
+        ledger = self.view(day)
+        ledger["base"] += amount
+        ledger["manual"] = True
+        self._propagate(day, True)
+
+
+class CarryoverEquivalenceTests(LedgerTestCase):
+    """The same page actions give the same budgets as the eager model.
+
+    Random sequences of expenses, deletes, budget updates, resets and
+    withdrawals run against the views and against EagerLedger; after
+    each action every day of the window must show the same budget.
+    """
+    SEEDS = range(8)
+    ACTIONS = 30
+    DAYS = 12
+
+    def _shown(self, user, day):
+        ledger = DailyLedger.objects.filter(user=user, date=day).first()
+        if ledger is not None:
+            return ledger.base_budget
+        return carry_into(user, day) or Decimal("0.00")
+
+    def _run(self, seed):
+        rng = random.Random(seed)
+        user = User.objects.create_user(username=f"eq-{seed}", password="pw")
+        self.client.force_login(user)
+        deposit(user, Decimal("100000"))
+        eager = EagerLedger()
+        first = date(2025, 10, 1)
+        window = [first + timedelta(days=offset) for offset in range(self.DAYS)]
+        expenses = []
+
+        def act(name, day, url, data, apply):
+            self.client.get(reverse("daily_view_date", args=(day.year, day.month, day.day)))
+            self.client.post(url, data)
+            apply()
+            # The eager pages were only right once each day had been viewed
+            # in order; the derived carry gives that without the views.
+            for shown_day in window:
+                eager.view(shown_day)
+            for shown_day in window:
+                self.assertEqual(
+                    self._shown(user, shown_day), eager.shown(shown_day),
+                    f"seed {seed}, {name} on {day}, shown on {shown_day}",
+                )
+
+        amount = Decimal(rng.randrange(50, 200))
+        act("update", first, reverse("update_budget", args=(2025, 10, 1)), {"new_base_budget": amount},
+            lambda: eager.update_budget(first, amount))
+        for _ in range(self.ACTIONS):
+            day = rng.choice(window)
+            day_url = reverse("daily_view_date", args=(day.year, day.month, day.day))
+            choice = rng.random()
+            if choice < 0.5:
+                price = Decimal(rng.randrange(1, 60))
+                before = Expense.objects.count()
+
+                def spend(day=day, price=price):
+                    added = eager.spend(day, price)
+                    self.assertEqual(Expense.objects.count() - before, int(added))
+                    if added:
+                        expenses.append((day, price, Expense.objects.latest("pk").pk))
+
+                act("spend", day, day_url, {"description": "Item", "price": price}, spend)
+            elif choice < 0.7 and expenses:
+                day, price, pk = expenses.pop(rng.randrange(len(expenses)))
+                act("delete", day, reverse("delete_expense", args=(pk,)), {},
+                    lambda day=day, price=price: eager.delete(day, price))
+            elif choice < 0.8:
+                amount = Decimal(rng.randrange(0, 150))
+                act("update", day, reverse("update_budget", args=(day.year, day.month, day.day)),
+                    {"new_base_budget": amount}, lambda day=day, amount=amount: eager.update_budget(day, amount))
+            elif choice < 0.9:
+                act("reset", day, reverse("reset_budget", args=(day.year, day.month, day.day)), {},
+                    lambda day=day: eager.reset(day))
+            else:
+                amount = Decimal(rng.randrange(1, 40))
+                act("withdraw", day, reverse("update_savings"),
+                    {"action": "withdraw", "amount": amount, "current_date": day.isoformat()},
+                    lambda day=day, amount=amount: eager.withdraw(day, amount))
+
+    def test_random_actions_match_eager_model(self):
+        for seed in self.SEEDS:
+            with self.subTest(seed=seed):
+                self._run(seed)
+
+    # Where the derived carry means to differ from the eager model
+
+    def test_carry_reaches_horizon_days_past_the_last_stored_day(self):
+        user = User.objects.create_user(username="eq-horizon", password="pw")
+        DailyLedger.objects.create(user=user, date=date(2025, 10, 1), base_budget=Decimal("80.00"))
+        last = date(2025, 10, 1) + timedelta(days=CARRYOVER_HORIZON_DAYS)
+
+        # Eager views created each day they reached, so a carry could be
+        # read on indefinitely; now it ends with the horizon.
+        self.assertEqual(carry_into(user, last), Decimal("80.00"))
+        self.assertIsNone(carry_into(user, last + timedelta(days=1)))
+
+    def test_withdrawal_into_unviewed_day_adds_to_its_carry(self):
+        user = User.objects.create_user(username="eq-withdraw", password="pw")
+        DailyLedger.objects.create(user=user, date=date(2025, 10, 1), base_budget=Decimal("80.00"))
+        deposit(user, Decimal("50"))
+
+        withdraw(user, Decimal("20.00"), date(2025, 10, 4))
+
+        # Eager created a day nobody had viewed at 0, so it held just 20
+        day = DailyLedger.objects.get(user=user, date=date(2025, 10, 4))
+        self.assertEqual((day.base_budget, day.is_manual_override), (Decimal("100.00"), True))
+
+
+class QueryInstrumentationTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="mona", password="pw")
+        self.client.force_login(self.user)
+
+    @override_settings(LEDGER_SERVER_TIMING=True)
+    def test_reports_queries_in_server_timing_and_log(self):
+        with self.assertLogs("ledger.requests", "INFO") as logs:
+            response = self.client.get(reverse("monthly_summary", args=(2025, 8)))
+
+        self.assertRegex(response["Server-Timing"], r'^sql;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+        self.assertIn("view=monthly_summary status=200", logs.output[0])
+
+    @override_settings(LEDGER_QUERY_BUDGETS={"monthly_summary": 1}, LEDGER_QUERY_BUDGET_STRICT=True)
+    def test_over_budget_fails_when_strict(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("monthly_summary", args=(2025, 8)))
+
+    @override_settings(LEDGER_QUERY_BUDGETS={"monthly_summary": {"POST": 1}}, LEDGER_QUERY_BUDGET_STRICT=False)
+    def test_budget_per_method_only_warns(self):
+        self.assertEqual(self.client.get(reverse("monthly_summary", args=(2025, 8))).status_code, 200)
+        with override_settings(LEDGER_QUERY_BUDGETS={"monthly_summary": 1}):
+            with self.assertLogs("ledger.requests", "WARNING") as logs:
+                self.client.get(reverse("monthly_summary", args=(2025, 8)))
+        self.assertIn("over its budget of 1", logs.output[-1])
+
+
+class SeedLedgerTests(LedgerTestCase):
+    def _history(self, prefix):
+        return list(
+            Expense.objects.filter(daily_ledger__user__username__startswith=f"{prefix}-")
+            .order_by("daily_ledger__user__username", "daily_ledger__date", "id")
+            .values_list("daily_ledger__user__username", "daily_ledger__date", "price", "category__title")
+        )
+
+    def test_same_seed_gives_same_history(self):
+        for prefix in ("one", "two"):
+            call_command("seed_ledger", "--users", "2", "--days", "20", "--end", "2025-01-31",
+                         "--seed", "7", "--prefix", prefix, stdout=io.StringIO())
+
+        one, two = self._history("one"), self._history("two")
+        self.assertTrue(one)
+        self.assertEqual([row[1:] for row in one], [row[1:] for row in two])
+        self.assertEqual(DailyLedger.objects.filter(user__username="one-0").count(), 20)
+        first = DailyLedger.objects.filter(user__username="one-1").order_by("date").first()
+        self.assertEqual(first.date, date(2025, 1, 12))
+        self.assertEqual(
+            (first.expense_total, first.expense_count),
+            (sum((e.price for e in first.expenses.all()), Decimal("0.00")), first.expenses.count()),
+        )
+
+
+class SpendIndexTests(LedgerTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="nina", password="pw")
+        self.client.force_login(self.user)
+        self.days = {
+            day: DailyLedger.objects.create(user=self.user, date=date(2025, 9, day), base_budget=Decimal("500.00"))
+            for day in (1, 5, 10)
+        }
+
+    def _add(self, day, price):
+        return Expense.objects.create(daily_ledger=self.days[day], description="Item", price=Decimal(price))
+
+    def _actual(self, first, last):
+        return Expense.objects.filter(
+            daily_ledger__user=self.user, daily_ledger__date__gte=first, daily_ledger__date__lte=last,
+        ).aggregate(total=Sum("price"))["total"] or Decimal("0.00")
+
+    def test_index_follows_expense_changes(self):
+        self._add(10, "30.00")
+        self._add(1, "10.00")  # backdated, shifts the 10th
+        moved = self._add(5, "20.00")
+        moved = Expense.objects.get(pk=moved.pk)
+        moved.price = Decimal("25.00")
+        moved.save()
+        moved.daily_ledger = self.days[1]
+        moved.save()
+        self._add(5, "7.50").delete()
+
+        for first, last in [(1, 30), (2, 9), (5, 5), (1, 1), (10, 10), (11, 30)]:
+            first, last = date(2025, 9, first), date(2025, 9, last)
+            self.assertEqual(spend_between(self.user.pk, first, last), self._actual(first, last), (first, last))
+        self.assertEqual(check_spend_index([self.user.pk]), [])
+
+    def test_endpoint_answers_any_range(self):
+        self._add(1, "10.00")
+        self._add(10, "30.00")
+        url = reverse("get_spend_range")
+
+        response = self.client.get(url, {"from": "2025-09-02", "to": "2025-12-31"})
+        self.assertEqual(response.json(), {"from": "2025-09-02", "to": "2025-12-31", "total": 30.0})
+        self.assertEqual(self.client.get(url, {"from": "0001-01-01", "to": "2025-09-01"}).json()["total"], 10.0)
+        self.assertEqual(self.client.get(url, {"from": "2025-09-10", "to": "2025-09-01"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"from": "yesterday"}).status_code, 400)
+
+    def test_deleting_account_with_expenses(self):
+        self._add(1, "10.00")
+        self._add(5, "20.00")
+
+        response = self.client.post(reverse("user_settings"), {
+            "action": "delete_account", "confirm_text": "DELETE", "password": "pw",
+        })
+
+        self.assertRedirects(response, reverse("login"), fetch_redirect_response=False)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(CumulativeSpend.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(MonthlyCategoryRollup.objects.filter(user_id=self.user.pk).exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        self._add(1, "10.00")
+        self._add(5, "20.00")
+        CumulativeSpend.objects.filter(user=self.user, date=date(2025, 9, 5)).update(total=Decimal("99.00"))
+
+        out = io.StringIO()
+        call_command("rebuild_spend_index", "--check", stdout=out)
+        self.assertIn("1 of", out.getvalue())
+        call_command("rebuild_spend_index", stdout=io.StringIO())
+
+        self.assertEqual(check_spend_index([self.user.pk]), [])
+        self.assertEqual(spend_between(self.user.pk, date(2025, 9, 1), date(2025, 9, 5)), Decimal("30.00"))
+
+
+@skipUnless(settings.DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3", "Tunes the SQLite setup only")
+class SQLiteWriterConcurrencyTests(LedgerTransactionTestCase):
+    """The app's write paths run from threads against one file database.
+
+    Each thread serves its requests through its own connection built from
+    the shipped database settings, pointed at a copy of the test database.
+    """
+    THREADS = 6
+    WRITES = 8
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        for suffix in ("-wal", "-shm"):
+            self.addCleanup(lambda name=self.path + suffix: os.path.exists(name) and os.remove(name))
+
+        self.user = User.objects.create_user(username="olga", password="pw")
+        deposit(self.user, Decimal("1000"))
+        self.day = date(2025, 11, 1)
+        DailyLedger.objects.create(user=self.user, date=self.day, base_budget=Decimal("1000.00"), is_manual_override=True)
+        connection.ensure_connection()
+        target = sqlite3.connect(self.path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def _open(self, alias):
+        # The shipped database settings, pointed at the copy
+        config = connections.configure_settings({"default": {
+            **copy.deepcopy(settings.DATABASES["default"]),
+            "NAME": self.path,
+        }})["default"]
+        connections[alias] = SQLiteDatabaseWrapper(config, alias)
+        return connections[alias]
+
+    def _close(self, alias):
+        connections[alias].close()
+        del connections[alias]
+
+    def _in_threads(self, action):
+        """Run action(client) WRITES times in each thread; return the errors."""
+        errors = []
+
+        def worker():
+            # Requests in this thread use the file through "default"
+            self._open("default")
+            try:
+                client = Client()
+                client.force_login(self.user)
+                for _ in range(self.WRITES):
+                    response = action(client)
+                    if response.status_code != 302:
+                        errors.append(response.status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                self._close("default")
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def _check(self):
+        self._open("check")
+        self.addCleanup(self._close, "check")
+        return "check"
+
+    def test_connections_use_wal(self):
+        with self._open("tuning").cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        self._close("tuning")
+
+    def test_concurrent_expenses_are_all_recorded(self):
+        url = reverse("daily_view_date", args=(2025, 11, 1))
+
+        errors = self._in_threads(lambda client: client.post(url, {"description": "Tea", "price": "1.00"}))
+
+        self.assertEqual(errors, [])
+        alias = self._check()
+        count = self.THREADS * self.WRITES
+        ledger = DailyLedger.objects.using(alias).get(user=self.user, date=self.day)
+        self.assertEqual((ledger.expense_count, ledger.expense_total), (count, Decimal(count)))
+        self.assertEqual(Expense.objects.using(alias).filter(daily_ledger=ledger).count(), count)
+        spend = CumulativeSpend.objects.using(alias).get(user=self.user, date=self.day)
+        self.assertEqual(spend.total, Decimal(count))
+
+    def test_concurrent_withdrawals_are_all_applied(self):
+        data = {"action": "withdraw", "amount": "2", "current_date": self.day.isoformat()}
+
+        errors = self._in_threads(lambda client: client.post(reverse("update_savings"), data))
+
+        self.assertEqual(errors, [])
+        alias = self._check()
+        moved = Decimal(2 * self.THREADS * self.WRITES)
+        self.assertEqual(SavingsAccount.objects.using(alias).get(user=self.user).balance, Decimal("1000.00") - moved)
+        ledger = DailyLedger.objects.using(alias).get(user=self.user, date=self.day)
+        self.assertEqual(ledger.base_budget, Decimal("1000.00") + moved)
+        withdrawals = SavingsTransaction.objects.using(alias).filter(kind=SavingsTransaction.WITHDRAW)
+        self.assertEqual(withdrawals.count(), self.THREADS * self.WRITES)
+
+    def test_reads_do_not_wait_for_an_open_write(self):
+        # IMMEDIATE applies to every atomic block, and every atomic block
+        # in the app writes. Reads run in autocommit and, under WAL, see
+        # the last commit without taking the write lock.
+        holding, release = threading.Event(), threading.Event()
+
+        def writer():
+            self._open("default")
+            try:
+                with transaction.atomic():
+                    DailyLedger.objects.filter(user=self.user).update(base_budget=Decimal("5.00"))
+                    holding.set()
+                    release.wait(10)
+            finally:
+                self._close("default")
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            self.assertTrue(holding.wait(10))
+            alias = self._check()
+            began = time.monotonic()
+            base = DailyLedger.objects.using(alias).get(user=self.user, date=self.day).base_budget
+            elapsed = time.monotonic() - began
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(base, Decimal("1000.00"))
+        self.assertLess(elapsed, 1)
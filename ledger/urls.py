@@ -1,7 +1,7 @@
 # ledger/urls.py
 
 from django.urls import path
-from .views import daily_view, update_savings, calendar_view, update_budget, get_day_summary, register, delete_expense, reset_budget, monthly_summary, hide_patch_notes, user_settings
+from .views import daily_view, update_savings, savings_history, calendar_view, update_budget, get_day_summary, get_month_summary, get_year_summary, get_spend_range, register, export_history, import_history, delete_expense, reset_budget, monthly_summary, year_summary, hide_patch_notes, user_settings
 
 urlpatterns = [
     # URL for today's ledger (the homepage)
@@ -12,6 +12,8 @@ urlpatterns = [
     
     # URL for the savings update action
     path('update-savings/', update_savings, name='update_savings'),
+    # Savings journal, newest first
+    path('savings/history/', savings_history, name='savings_history'),
     
     # URL for the default calendar view
     path('calendar/', calendar_view, name='calendar_view_default'),
@@ -20,6 +22,8 @@ urlpatterns = [
     path('calendar/<int:year>/<int:month>/', calendar_view, name='calendar_view'),
     # Monthly expense summary with percentages
     path('summary/<int:year>/<int:month>/', monthly_summary, name='monthly_summary'),
+    # Year in review
+    path('summary/<int:year>/', year_summary, name='year_summary'),
     # Patch notes preference
     path('hide-patch-notes/', hide_patch_notes, name='hide_patch_notes'),
     
@@ -29,8 +33,17 @@ urlpatterns = [
     
     # AJAX endpoint for getting day summary
     path('api/day-summary/', get_day_summary, name='get_day_summary'),
+    # AJAX endpoint for every day of a month at once (calendar hovers)
+    path('api/month-summary/<int:year>/<int:month>/', get_month_summary, name='get_month_summary'),
+    path('api/year-summary/<int:year>/', get_year_summary, name='get_year_summary'),
+    # Spend between two dates, ?from=YYYY-MM-DD&to=YYYY-MM-DD
+    path('api/spend-range/', get_spend_range, name='get_spend_range'),
     path('register/', register, name='register'),
     path('settings/', user_settings, name='user_settings'),
+    # Streaming download of the whole ledger history
+    path('export/', export_history, name='export_history'),
+    # Bulk expense import (CSV or JSON upload)
+    path('import/', import_history, name='import_history'),
     # Expense delete (edit removed)
     path('expense/<int:expense_id>/delete/', delete_expense, name='delete_expense'),
 ]
\ No newline at end of file
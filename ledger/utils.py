@@ -1,31 +1,104 @@
 # ledger/utils.py
 from calendar import HTMLCalendar
-from django.urls import reverse
+from functools import lru_cache
+from django.urls import reverse, get_script_prefix
 from django.utils import timezone
 from datetime import date
 
+
+def month_bounds(year, month):
+    """Return the half-open date range [first day, first day of next month)."""
+    first = date(year, month, 1)
+    if month == 12:
+        return first, date(year + 1, 1, 1)
+    return first, date(year, month + 1, 1)
+
+
+def _day_url_prefix(year, month):
+    """Resolve the daily_view_date URL once and return it without the day."""
+    url = reverse('daily_view_date', args=(year, month, 1))
+    return url[:-len('1/')]
+
+
+@lru_cache(maxsize=256)
+def _month_skeleton(year, month, today, firstweekday, withyear, script_prefix):
+    """Pre-render everything about a month that does not depend on the user.
+
+    Returns the table head and, per week, a tuple of cells. A cell is None
+    for days outside the month, otherwise (date, opening markup up to the
+    class list, day number). Keyed on today so past/today classes stay
+    right, and on the script prefix since it is part of every URL.
+    """
+    cal = HTMLCalendar(firstweekday)
+    head = ''.join([
+        '<table class="ledger-calendar">\n',
+        cal.formatmonthname(year, month, withyear), '\n',
+        cal.formatweekheader(), '\n',
+    ])
+
+    prefix = _day_url_prefix(year, month)
+    weeks = []
+    for week in cal.monthdayscalendar(year, month):
+        cells = []
+        for day in week:
+            if day == 0:
+                cells.append(None)
+                continue
+            current_day = date(year, month, day)
+            if current_day < today:
+                base_classes = "calendar-day-link past-day"
+            elif current_day == today:
+                base_classes = "calendar-day-link today"
+            else:
+                base_classes = "calendar-day-link"
+            opening = (
+                f'<td><a href="{prefix}{day}/" data-year="{year}" data-month="{month}" '
+                f'data-day="{day}" class="{base_classes}'
+            )
+            cells.append((current_day, opening, str(day)))
+        weeks.append(tuple(cells))
+    return head, tuple(weeks)
+
+
 class LedgerHTMLCalendar(HTMLCalendar):
+    NODAY = '<td class="noday">&nbsp;</td>'  # day outside month
+
+    def __init__(self, day_data=None, firstweekday=0):
+        """day_data maps a date to (total_expenses, base_budget, status)."""
+        super().__init__(firstweekday)
+        self.day_data = day_data or {}
+
+    def _format_cell(self, cell):
+        if cell is None:
+            return self.NODAY
+        current_day, opening, day_str = cell
+
+        # Heatmap: colour by status and show the day's spend when known
+        figures = self.day_data.get(current_day)
+        if figures is None:
+            return f'{opening}">{day_str}</a></td>'
+        total, _base, status = figures
+        if total:
+            return (
+                f'{opening} status-{status.lower()} has-spend">{day_str}'
+                f'<span class="day-spend">₱{total:,.2f}</span></a></td>'
+            )
+        return f'{opening} status-{status.lower()}">{day_str}</a></td>'
+
+    def _skeleton(self, theyear, themonth, withyear=True):
+        # "today" is computed once per render, not once per cell
+        today = timezone.now().date()
+        return _month_skeleton(theyear, themonth, today, self.firstweekday, withyear, get_script_prefix())
+
     def formatday(self, day, weekday):
         if day == 0:
-            return '<td class="noday">&nbsp;</td>'  # day outside month
-        else:
-            url = reverse('daily_view_date', args=(self.year, self.month, day))
-            
-            # Check if this day is in the past
-            today = timezone.now().date()
-            current_day = date(self.year, self.month, day)
-            
-            # Determine CSS classes
-            css_classes = ["calendar-day-link"]
-            if current_day < today:
-                css_classes.append("past-day")
-            elif current_day == today:
-                css_classes.append("today")
-            
-            class_str = " ".join(css_classes)
-            
-            # Add data attributes for hover functionality
-            return f'<td><a href="{url}" data-year="{self.year}" data-month="{self.month}" data-day="{day}" class="{class_str}">{day}</a></td>'
+            return self.NODAY
+        _head, weeks = self._skeleton(self.year, self.month)
+        for week in weeks:
+            for cell in week:
+                if cell is not None and cell[0].day == day:
+                    return self._format_cell(cell)
+        return self.NODAY
 
     def formatweek(self, theweek):
         week = ''.join(self.formatday(d, wd) for (d, wd) in theweek)
@@ -33,12 +106,14 @@ class LedgerHTMLCalendar(HTMLCalendar):
 
     def formatmonth(self, theyear, themonth, withyear=True):
         self.year, self.month = theyear, themonth
-        
-        # This is the key change: adding the 'ledger-calendar' class to the table
-        cal = f'<table class="ledger-calendar">\n'
-        cal += f'{self.formatmonthname(theyear, themonth, withyear)}\n'
-        cal += f'{self.formatweekheader()}\n'
-        for week in self.monthdays2calendar(theyear, themonth):
-            cal += f'{self.formatweek(week)}\n'
-        cal += '</table>\n'
-        return cal
\ No newline at end of file
+        head, weeks = self._skeleton(theyear, themonth, withyear)
+
+        # Assemble with a single join instead of repeated concatenation
+        parts = [head]
+        format_cell = self._format_cell
+        for week in weeks:
+            parts.append('<tr>')
+            parts.extend(format_cell(cell) for cell in week)
+            parts.append('</tr>\n')
+        parts.append('</table>\n')
+        return ''.join(parts)
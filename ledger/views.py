@@ -1,73 +1,119 @@
 # ledger/views.py
+import csv
+import hashlib
+import io
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
-from django.http import JsonResponse
-from .models import DailyLedger, Expense, SavingsAccount, Category, ensure_default_categories_for_user
+from django.http import JsonResponse, Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .models import DailyLedger, Expense, SavingsAccount, SavingsTransaction, Category, MonthlyCategoryRollup, ensure_default_categories_for_user
 from decimal import Decimal
 from datetime import date, timedelta
-from .utils import LedgerHTMLCalendar, reverse
+from .utils import LedgerHTMLCalendar, reverse, month_bounds
+from .carryover import (
+    carry_into, fill_carried_days, get_or_create_day, heal_day, propagate_carryover, cascade_carryover,
+)
+from .analytics import build_year_summary
+from .savings import SavingsError, deposit, withdraw
+from .export import EXPORT_FORMATS, export_stream
+from .spend_index import spend_between
+from .importer import IMPORT_FORMATS, csv_records, import_expenses, json_records
+from .caching import cached_user_payload, release_token, user_validators
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
 from .forms import RegistrationForm, ProfileUpdateForm, AccountDeletionForm
-from django.db.models import Sum
 from django.contrib import messages
-from django.db.models import Sum
+from django.db import transaction
 
 
-def propagate_carryover(user, start_date: date, preserve_manual_increases: bool = True):
-    """Propagate remaining budget forward to successive days.
+def _skip_conditional(request):
+    # Only cacheable reads by a signed-in user; pending flash messages must
+    # be rendered, so never answer those with 304.
+    return (
+        request.method not in ('GET', 'HEAD')
+        or not request.user.is_authenticated
+        or len(messages.get_messages(request)) > 0
+    )
+
+
+def _ledger_etag(request, *args, **kwargs):
+    if _skip_conditional(request):
+        return None
+    generation, _changed_at = user_validators(request)
+    if generation is None:
+        return None
+    # The session key changes on login (with the CSRF secret embedded in
+    # forms), the date covers pages that depend on "today" and the
+    # release covers templates and code that changed with a deploy.
+    parts = (
+        release_token(),
+        request.get_full_path(),
+        request.user.pk,
+        generation,
+        request.session.session_key or '',
+        timezone.now().date().isoformat(),
+    )
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+
+def conditional_ledger_view(view):
+    """Answer unchanged GETs with 304 Not Modified, validated per user.
+
+    The ETag comes from the user's data generation on UserProfile, read in
+    one query, so an unchanged page is neither computed nor rendered.
+    There is no Last-Modified: it only has one-second precision, so a
+    change within the same second would still be answered with 304.
+    Responses are private and always revalidated.
+    """
+    view = condition(etag_func=_ledger_etag)(view)
+    return cache_control(private=True, no_cache=True)(view)
+
 
-    When preserve_manual_increases is True, we will only increase future
-    days to match today's remaining (never lower), which preserves manual
-    bumps such as savings withdrawals. When False, we force the next day's
-    base to equal today's remaining (lowering allowed), which is needed
-    after expense edits so future days reflect reduced remaining.
+def _month_ledgers(user, year, month):
+    """Return the user's ledgers for a month keyed by date.
 
-    We never overwrite a day that already has expenses.
+    Stored days come from one query; days that are not stored but are
+    carried into are added as unsaved ledgers, at the cost of one more.
     """
-    horizon_days = 60
-    current_date = start_date
-
-    for _ in range(horizon_days):
-        ledger = DailyLedger.objects.filter(user=user, date=current_date).first()
-        if not ledger:
-            break
-
-        remaining = ledger.remaining_budget
-        next_date = current_date + timedelta(days=1)
-
-        # Ensure next day exists (so user can see ahead)
-        next_ledger, _ = DailyLedger.objects.get_or_create(user=user, date=next_date)
-
-        # If next day already has expenses, stop propagation at that boundary
-        if next_ledger.expenses.exists():
-            break
-
-        # Respect manual override: do not overwrite or pass through beyond a day
-        # that the user explicitly set (e.g., Reset Budget or manual base edits).
-        if getattr(next_ledger, 'is_manual_override', False):
-            break
-
-        if preserve_manual_increases:
-            # Only raise the next day up to remaining; do not reduce it
-            if next_ledger.base_budget < remaining:
-                next_ledger.base_budget = remaining
-                next_ledger.save()
-        else:
-            # Force exact carryover. Use this after expense changes so
-            # subsequent days reflect lowered remaining.
-            if next_ledger.base_budget != remaining:
-                next_ledger.base_budget = remaining
-                next_ledger.save()
-
-        if remaining <= Decimal('0.00'):
-            break
-
-        current_date = next_date
+    first, next_first = month_bounds(year, month)
+    ledgers = (
+        DailyLedger.objects
+        .filter(user=user, date__gte=first, date__lt=next_first)
+        .only('date', 'base_budget', 'expense_total', 'expense_count')
+    )
+    return fill_carried_days(user, {ledger.date: ledger for ledger in ledgers}, first, next_first - timedelta(days=1))
+
+
+def _day_summary_payload(ledger):
+    return {
+        'total_expenses': float(ledger.total_expenses),
+        'remaining_budget': float(ledger.daily_savings),
+        'effective_budget': float(ledger.effective_budget),
+        'status': ledger.status,
+        'usage_percentage': float(ledger.budget_usage_percentage)
+    }
+
+
+def _prepare_day_for_write(user, current_date, ledger):
+    """Persist the day with its carryover before an expense is written to it."""
+    if ledger is None:
+        ledger = get_or_create_day(user, current_date)
+    else:
+        heal_day(user, ledger)
+
+    # After computing today's state, propagate remaining forward to successive days
+    propagate_carryover(user, current_date)
+    # Ensure default categories exist for this user so the datalist has options.
+    # Free after the first call: signup seeds them and a cache marker remembers it.
+    ensure_default_categories_for_user(user)
+    return ledger
+
 
 @login_required(login_url='login')
+@conditional_ledger_view
 def daily_view(request, year=None, month=None, day=None):
     if year and month and day:
         current_date = date(year, month, day)
@@ -77,22 +123,15 @@ def daily_view(request, year=None, month=None, day=None):
     previous_day = current_date - timedelta(days=1)
     next_day = current_date + timedelta(days=1)
     
-    ledger, created = DailyLedger.objects.get_or_create(user=request.user, date=current_date)
-    # Carry over yesterday's remaining into today's base budget. Self-heal if ledger exists but differs and has no expenses yet.
-    prev_ledger = DailyLedger.objects.filter(user=request.user, date=previous_day).first()
-    if prev_ledger and not getattr(ledger, 'is_manual_override', False):
-        remaining_yesterday = (prev_ledger.base_budget - (prev_ledger.expenses.aggregate(total=Sum('price'))['total'] or Decimal('0.00')))
-        carry = remaining_yesterday if remaining_yesterday > Decimal('0.00') else Decimal('0.00')
-        # If today has no expenses yet and not manually overridden, carry over.
-        if ledger.expenses.count() == 0 and ledger.base_budget != carry:
-            ledger.base_budget = carry
-            ledger.save()
-
-    # After computing today's state, propagate remaining forward to successive days
-    propagate_carryover(request.user, current_date)
-    savings_account, _ = SavingsAccount.objects.get_or_create(user=request.user)
-    # Ensure default categories exist for this user so the datalist has options.
-    ensure_default_categories_for_user(request.user)
+    ledger = DailyLedger.objects.filter(user=request.user, date=current_date).first()
+    if request.method == 'POST':
+        ledger = _prepare_day_for_write(request.user, current_date, ledger)
+    elif ledger is None:
+        # Show the day as it would be carried into without creating it;
+        # the first write to it persists the row.
+        ledger = DailyLedger(user=request.user, date=current_date, base_budget=carry_into(request.user, current_date) or Decimal('0.00'))
+    # Reads never create the account; deposits and withdrawals do.
+    savings_account = SavingsAccount.objects.filter(user=request.user).first() or SavingsAccount(user=request.user)
 
     # Handle expense submission
     if request.method == 'POST':
@@ -118,23 +157,48 @@ def daily_view(request, year=None, month=None, day=None):
                                 user=request.user,
                                 title=category_text
                             )
-                        Expense.objects.create(daily_ledger=ledger, category=category, description=description, price=price)
-                        # Expense changes remaining; re-run propagation from this date, forcing exact carryover
-                        propagate_carryover(request.user, current_date, preserve_manual_increases=False)
+                        # The expense row, the ledger totals kept by signals and
+                        # the carryover they feed are committed together.
+                        with transaction.atomic():
+                            Expense.objects.create(daily_ledger=ledger, category=category, description=description, price=price)
+                            # Expense changes remaining; re-run propagation from this date, forcing exact carryover
+                            propagate_carryover(request.user, current_date, preserve_manual_increases=False)
             except (ValueError, TypeError):
                 pass
         return redirect('daily_view_date', year=current_date.year, month=current_date.month, day=current_date.day)
 
-    expenses_today = ledger.expenses.all()
-    # Aggregate totals by category for display
-    expenses_by_category = (
-        ledger.expenses
-        .values('category__title', 'category__color')
-        .annotate(total=Sum('price'))
-        .order_by('category__title')
+    def build_day():
+        if ledger.pk is None:
+            return {'expenses': [], 'expenses_by_category': []}
+        # One joined query; the template reads each expense's category.
+        expenses = list(ledger.expenses.select_related('category'))
+        # Totals by category for display, from the rows already loaded
+        by_category = {}
+        for expense in expenses:
+            key = (expense.category.title, expense.category.color) if expense.category else (None, None)
+            by_category[key] = by_category.get(key, Decimal('0.00')) + expense.price
+        # Uncategorized first, then by title
+        rows = sorted(by_category.items(), key=lambda item: (item[0][0] is not None, item[0][0] or ''))
+        expenses_by_category = [
+            {'category__title': title, 'category__color': color, 'total': total}
+            for (title, color), total in rows
+        ]
+        return {'expenses': expenses, 'expenses_by_category': expenses_by_category}
+
+    # Nothing was written on the way here (POSTs redirected above), so the
+    # generation read by the conditional check is still current.
+    generation, _changed_at = user_validators(request)
+    day_payload = cached_user_payload(
+        request.user, 'day', (current_date.isoformat(),), build_day, generation=generation,
+    )
+    expenses_today = day_payload['expenses']
+    expenses_by_category = day_payload['expenses_by_category']
+    # Shared by every day's page, so cached once per user rather than per date
+    category_titles = cached_user_payload(
+        request.user, 'category-titles', (),
+        lambda: list(Category.objects.filter(user=request.user).order_by('title').values_list('title', flat=True)),
+        generation=generation,
     )
-    categories = Category.objects.filter(user=request.user).order_by('title')
-    categories = categories.annotate(total_expenses=Sum('expenses__price'))
     context = {
         'ledger': ledger,
         'expenses': expenses_today,
@@ -144,7 +208,7 @@ def daily_view(request, year=None, month=None, day=None):
         'today_long': current_date.strftime("%m/%d/%Y | %A"),
         'previous_day': previous_day,
         'next_day': next_day,
-        'categories': categories,
+        'category_titles': category_titles,
         'expenses_by_category': expenses_by_category,
         'is_today': current_date == timezone.now().date(),
     }
@@ -170,53 +234,24 @@ def update_savings(request):
             if amount_str and action:
                 amount = Decimal(amount_str)
                 
-                # 2. Get the single savings account object
-                savings_account, _ = SavingsAccount.objects.get_or_create(user=request.user)
-
-                # 3. Perform the correct action based on which button was clicked
-                if action == 'add':
-                    # Must be a whole positive number
-                    if amount <= 0:
-                        messages.error(request, "Amount must be a whole, positive number.")
-                        return redirect('daily_view_date', year=target_date.year, month=target_date.month, day=target_date.day)
-                    # ensure whole number
-                    if amount != amount.to_integral_value():
-                        messages.error(request, "Amount must be a whole number (no decimals).")
-                        return redirect('daily_view_date', year=target_date.year, month=target_date.month, day=target_date.day)
-                    savings_account.balance += amount
-                    messages.success(request, f"Added ₱{amount} to savings.")
-                elif action == 'withdraw':
-                    if savings_account.balance <= Decimal('0.00'):
-                        messages.error(request, "Cannot withdraw. Savings is zero or negative.")
-                        return redirect('daily_view_date', year=target_date.year, month=target_date.month, day=target_date.day)
-                    if amount > savings_account.balance:
-                        messages.error(request, "Cannot withdraw more than available savings.")
-                        return redirect('daily_view_date', year=target_date.year, month=target_date.month, day=target_date.day)
-                    # Decrease savings and move cash to today's effective budget (base_budget)
-                    savings_account.balance -= amount
-                    
-                    # Ensure the target day's ledger exists and add withdrawn amount to base budget
-                    target_ledger, _ = DailyLedger.objects.get_or_create(user=request.user, date=target_date)
-                    target_ledger.base_budget += amount
-                    # Mark as manual so auto-carry does not overwrite
-                    target_ledger.is_manual_override = True
-                    target_ledger.save()
-
-                    # Changing this day's base affects future carryover.
-                    # Preserve manual increases so we don't lower future days.
-                    propagate_carryover(request.user, target_date, preserve_manual_increases=True)
-                    
-                    messages.success(request, f"Withdrew ₱{amount} from savings and added to today's budget.")
-                
-                # 4. Save the changes to the database
-                savings_account.save()
+                # 2. Apply the change as one atomic update (see ledger.savings)
+                try:
+                    if action == 'add':
+                        deposit(request.user, amount)
+                        messages.success(request, f"Added ₱{amount} to savings.")
+                    elif action == 'withdraw':
+                        withdraw(request.user, amount, target_date)
+                        messages.success(request, f"Withdrew ₱{amount} from savings and added to today's budget.")
+                except SavingsError as error:
+                    messages.error(request, str(error))
+                    return redirect('daily_view_date', year=target_date.year, month=target_date.month, day=target_date.day)
 
         except (ValueError, TypeError):
             # If the amount is not a valid number, do nothing.
             # A more advanced app might show an error message.
             pass
     
-    # 5. Redirect the user back to the date they were viewing (or today by default)
+    # 3. Redirect the user back to the date they were viewing (or today by default)
     try:
         current_date_str = request.POST.get('current_date')
         if current_date_str:
@@ -226,13 +261,59 @@ def update_savings(request):
         pass
     return redirect('daily_view_today')
 
+SAVINGS_HISTORY_PAGE_SIZE = 25
+
+
+@login_required(login_url='login')
+@conditional_ledger_view
+def savings_history(request):
+    """List the savings journal newest first, paged by id rather than offset.
+
+    ?before=<id> shows the entries older than that one; each page is an
+    index range scan on (account, id) however deep the history goes.
+    """
+    # Reads never create the account; deposits and withdrawals do.
+    account = SavingsAccount.objects.filter(user=request.user).first() or SavingsAccount(user=request.user)
+    entries = SavingsTransaction.objects.filter(account=account) if account.pk else SavingsTransaction.objects.none()
+    entries = entries.order_by('-id')
+    before = request.GET.get('before')
+    if before:
+        try:
+            entries = entries.filter(id__lt=int(before))
+        except ValueError:
+            raise Http404("Invalid page")
+
+    page = list(entries[:SAVINGS_HISTORY_PAGE_SIZE + 1])
+    has_older = len(page) > SAVINGS_HISTORY_PAGE_SIZE
+    page = page[:SAVINGS_HISTORY_PAGE_SIZE]
+
+    today = timezone.now().date()
+    context = {
+        'savings_account': account,
+        'entries': page,
+        'older_url': f"{reverse('savings_history')}?before={page[-1].pk}" if has_older else None,
+        'newest_url': reverse('savings_history') if before else None,
+        'ledger_today_url': reverse('daily_view_date', args=(today.year, today.month, today.day)),
+    }
+    return render(request, 'ledger/savings_history.html', context)
+
+
 @login_required(login_url='login')
+@conditional_ledger_view
 def calendar_view(request, year=None, month=None):
     if year is None or month is None:
         today = timezone.now().date()
         year, month = today.year, today.month
 
-    cal = LedgerHTMLCalendar().formatmonth(year, month)
+    # One query for the month's stored days drives the heatmap cells
+    def build_day_data():
+        return {
+            day: (ledger.total_expenses, ledger.base_budget, ledger.status)
+            for day, ledger in _month_ledgers(request.user, year, month).items()
+        }
+
+    day_data = cached_user_payload(request.user, 'calendar-map', (year, month), build_day_data)
+    cal = LedgerHTMLCalendar(day_data).formatmonth(year, month)
     
     # Logic for previous/next month links
     next_month = month + 1
@@ -249,6 +330,7 @@ def calendar_view(request, year=None, month=None):
 
     context = {
         'calendar': cal,
+        'month_summary_url': reverse('get_month_summary', args=(year, month)),
         'current_month_name': date(year, month, 1).strftime('%B %Y'),
         'next_month_url': reverse('calendar_view', args=(next_year, next_month)),
         'prev_month_url': reverse('calendar_view', args=(prev_year, prev_month)),
@@ -256,23 +338,14 @@ def calendar_view(request, year=None, month=None):
     return render(request, 'ledger/calendar.html', context)
 
 
-@login_required(login_url='login')
-def monthly_summary(request, year=None, month=None):
-    """Show monthly totals per category with percentages for the selected month."""
-    if year is None or month is None:
-        today = timezone.now().date()
-        year, month = today.year, today.month
-
-    # Aggregate expenses for this user by category across the month
-    qs = (
-        Expense.objects
-        .filter(
-            daily_ledger__user=request.user,
-            daily_ledger__date__year=year,
-            daily_ledger__date__month=month,
-        )
-        .values('category__title', 'category__color')
-        .annotate(total=Sum('price'))
+def _month_summary_rows(user, year, month):
+    """Return (rows, month_total) of per-category totals with percentages."""
+    # Per-category totals are kept in MonthlyCategoryRollup (one row per
+    # category used this month), so no expenses are scanned here.
+    qs = list(
+        MonthlyCategoryRollup.objects
+        .filter(user=user, year=year, month=month)
+        .values('category__title', 'category__color', 'total')
         .order_by('-total')
     )
 
@@ -291,6 +364,21 @@ def monthly_summary(request, year=None, month=None):
             'total': total,
             'percent': percent,
         })
+    return summary_rows, month_total
+
+
+@login_required(login_url='login')
+@conditional_ledger_view
+def monthly_summary(request, year=None, month=None):
+    """Show monthly totals per category with percentages for the selected month."""
+    if year is None or month is None:
+        today = timezone.now().date()
+        year, month = today.year, today.month
+
+    summary_rows, month_total = cached_user_payload(
+        request.user, 'month-summary', (year, month),
+        lambda: _month_summary_rows(request.user, year, month),
+    )
 
     # Compute prev/next month links
     next_month = month + 1
@@ -314,12 +402,154 @@ def monthly_summary(request, year=None, month=None):
         'year': year,
         'month': month,
         'calendar_url': reverse('calendar_view', args=(year, month)),
+        'year_summary_url': reverse('year_summary', args=(year,)),
         'ledger_today_url': reverse('daily_view_date', args=(timezone.now().date().year, timezone.now().date().month, timezone.now().date().day)),
     }
 
     return render(request, 'ledger/monthly_summary.html', context)
 
 
+def _year_summary(user, year):
+    today = timezone.now().date()
+    # Keyed on today too: the current year's figures stop at today
+    return cached_user_payload(
+        user, 'year-summary', (year, min(today, date(year, 12, 31))),
+        lambda: build_year_summary(user, year, today),
+    )
+
+
+@login_required(login_url='login')
+@conditional_ledger_view
+def year_summary(request, year=None):
+    """Year in review: month x category totals, daily spend and budget flow."""
+    if year is None:
+        year = timezone.now().date().year
+    if not 1 <= year < 9999:
+        raise Http404("Invalid year")
+
+    summary = _year_summary(request.user, year)
+    months = []
+    for index, flow in enumerate(summary['flow']):
+        months.append({
+            'name': date(year, index + 1, 1).strftime('%B'),
+            'url': reverse('monthly_summary', args=(year, index + 1)),
+            'total': summary['month_totals'][index],
+            'cells': [category['months'][index] for category in summary['categories']],
+            'flow': flow,
+        })
+
+    today = timezone.now().date()
+    context = {
+        'summary': summary,
+        'months': months,
+        'year': year,
+        'prev_year_url': reverse('year_summary', args=(year - 1,)),
+        'next_year_url': reverse('year_summary', args=(year + 1,)),
+        'calendar_url': reverse('calendar_view', args=(year, today.month if year == today.year else 1)),
+        'ledger_today_url': reverse('daily_view_date', args=(today.year, today.month, today.day)),
+    }
+    return render(request, 'ledger/year_summary.html', context)
+
+
+@login_required(login_url='login')
+@conditional_ledger_view
+def get_year_summary(request, year):
+    """AJAX endpoint with the year-in-review figures as JSON."""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    if not 1 <= year < 9999:
+        return JsonResponse({'error': 'Invalid year'}, status=400)
+    return JsonResponse(_year_summary(request.user, year))
+
+
+@login_required(login_url='login')
+@conditional_ledger_view
+def get_spend_range(request):
+    """AJAX endpoint with the spend between ?from= and ?to= (inclusive).
+
+    Answered from the cumulative spend index with two lookups, however
+    long the range.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        first = date.fromisoformat(request.GET.get('from', ''))
+        last = date.fromisoformat(request.GET.get('to', ''))
+    except ValueError:
+        return JsonResponse({'error': 'from and to must be YYYY-MM-DD dates'}, status=400)
+    if first > last:
+        return JsonResponse({'error': 'from must not be after to'}, status=400)
+    total = spend_between(request.user.pk, first, last)
+    return JsonResponse({'from': first.isoformat(), 'to': last.isoformat(), 'total': float(total)})
+
+
+@login_required(login_url='login')
+def export_history(request):
+    """Download the user's whole ledger history as CSV or NDJSON.
+
+    ?format=csv|ndjson picks the format and ?gzip=1 compresses it on the
+    fly. The body is streamed, so memory use does not grow with history.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Unknown export format.")
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"ledgerly-{request.user.username}-{timezone.now().date().isoformat()}.{export_format}"
+    if compress:
+        content_type = 'application/gzip'
+        filename += '.gz'
+
+    response = StreamingHttpResponse(export_stream(request.user, export_format, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+IMPORT_ERRORS_SHOWN = 5
+
+
+@login_required(login_url='login')
+def import_history(request):
+    """Import expenses from an uploaded CSV or JSON file (see ledger.importer).
+
+    The upload is parsed as a stream and written in batches; the format
+    comes from the form or else the file extension.
+    """
+    if request.method != 'POST':
+        return redirect('user_settings')
+    upload = request.FILES.get('file')
+    if upload is None:
+        messages.error(request, "Choose a file to import.")
+        return redirect('user_settings')
+
+    import_format = request.POST.get('format') or (
+        'json' if upload.name.lower().endswith(('.json', '.ndjson', '.jsonl')) else 'csv'
+    )
+    if import_format not in IMPORT_FORMATS:
+        messages.error(request, "Unknown import format.")
+        return redirect('user_settings')
+
+    stream = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    records = csv_records(stream) if import_format == 'csv' else json_records(stream)
+    try:
+        result = import_expenses(request.user, records)
+    except (ValueError, UnicodeDecodeError, csv.Error) as error:
+        messages.error(request, f"Import failed, nothing was saved: {error}")
+        return redirect('user_settings')
+
+    messages.success(
+        request,
+        f"Imported {result.expenses} expenses ({result.days_created} new days, "
+        f"{result.categories_created} new categories).",
+    )
+    if result.skipped:
+        shown = '; '.join(result.errors[:IMPORT_ERRORS_SHOWN])
+        messages.warning(request, f"Skipped {result.skipped} invalid rows. {shown}")
+    return redirect('user_settings')
+
+
 def hide_patch_notes(request):
     """Remember the user's choice to hide patch notes for a specific version using session."""
     if request.method == 'POST':
@@ -334,15 +564,19 @@ def update_budget(request, year, month, day):
     if request.method == 'POST':
         try:
             current_date = date(year, month, day)
-            ledger = DailyLedger.objects.get(user=request.user, date=current_date)
             # Allow explicit base budget update for the selected date
             new_budget_str = request.POST.get('new_base_budget')
             
             if new_budget_str:
-                ledger.base_budget = Decimal(new_budget_str)
-                ledger.is_manual_override = True
-                ledger.save()
-        except (DailyLedger.DoesNotExist, ValueError, TypeError):
+                new_budget = Decimal(new_budget_str)
+                with transaction.atomic():
+                    ledger = get_or_create_day(request.user, current_date)
+                    ledger.base_budget = new_budget
+                    ledger.is_manual_override = True
+                    ledger.save(update_fields=['base_budget', 'is_manual_override'])
+                    # The days after it carry the new remaining, up or down
+                    propagate_carryover(request.user, current_date, preserve_manual_increases=False)
+        except (ValueError, TypeError, ArithmeticError):
             pass
     
     return redirect('daily_view_date', year=year, month=month, day=day)
@@ -354,31 +588,28 @@ def reset_budget(request, year, month, day):
     affecting previous days, and cascade the change forward.
 
     Implementation detail: set base_budget to equal the sum of today's
-    expenses so remaining becomes zero. Then propagate exact carryover to
-    future days, which applies the new remaining (zero) forward.
+    expenses so remaining becomes zero. Then cascade exact carryover
+    through the following days in one forward pass, which applies the new
+    remaining (zero) forward.
     """
     if request.method == 'POST':
-        try:
-            current_date = date(year, month, day)
-            ledger = DailyLedger.objects.get(user=request.user, date=current_date)
-            # Make remaining zero
-            ledger.base_budget = ledger.total_expenses
-            ledger.is_manual_override = True
-            ledger.save()
-
-            # Cascade forward. Each call sets the next day exactly to this
-            # day's remaining and stops; looping fans the change forward.
-            loop_date = current_date
-            for _ in range(60):
-                propagate_carryover(request.user, loop_date, preserve_manual_increases=False)
-                loop_date = loop_date + timedelta(days=1)
-
-            messages.success(request, "Effective daily budget reset for this date.")
-        except DailyLedger.DoesNotExist:
-            pass
+        current_date = date(year, month, day)
+        # The day may only have been shown so far, not stored
+        ledger = get_or_create_day(request.user, current_date)
+        # Make remaining zero
+        ledger.base_budget = ledger.total_expenses
+        ledger.is_manual_override = True
+        ledger.save(update_fields=['base_budget', 'is_manual_override'])
+
+        # Cascade forward: every following day in the window is set
+        # exactly to its predecessor's remaining, read and written once.
+        cascade_carryover(request.user, current_date)
+
+        messages.success(request, "Effective daily budget reset for this date.")
     return redirect('daily_view_date', year=year, month=month, day=day)
 
 @login_required(login_url='login')
+@conditional_ledger_view
 def get_day_summary(request):
     """AJAX endpoint to get expense summary for a specific date"""
     if request.method == 'GET':
@@ -389,15 +620,13 @@ def get_day_summary(request):
         try:
             target_date = date(year, month, day)
             ledger = DailyLedger.objects.get(user=request.user, date=target_date)
-            
-            data = {
-                'total_expenses': float(ledger.total_expenses),
-                'remaining_budget': float(ledger.daily_savings),
-                'effective_budget': float(ledger.effective_budget),
-                'status': ledger.status,
-                'usage_percentage': float(ledger.budget_usage_percentage)
-            }
+            data = _day_summary_payload(ledger)
         except DailyLedger.DoesNotExist:
+            carry = carry_into(request.user, target_date)
+            if carry is not None:
+                # Not stored but carried into: no expenses, the carry as budget
+                data = _day_summary_payload(DailyLedger(user=request.user, date=target_date, base_budget=carry))
+                return JsonResponse(data)
             # If no ledger exists for this date, assume no expenses
             data = {
                 'total_expenses': 0,
@@ -412,6 +641,31 @@ def get_day_summary(request):
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
+@login_required(login_url='login')
+@conditional_ledger_view
+def get_month_summary(request, year, month):
+    """AJAX endpoint returning every day of a month in one response.
+
+    Days that are neither stored nor carried into are omitted; the
+    calendar treats them as no data.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        month_bounds(year, month)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid month'}, status=400)
+
+    days = cached_user_payload(
+        request.user, 'month-days', (year, month),
+        lambda: {
+            str(day.day): _day_summary_payload(ledger)
+            for day, ledger in _month_ledgers(request.user, year, month).items()
+        },
+    )
+    return JsonResponse({'year': year, 'month': month, 'days': days})
+
+
 @login_required(login_url='login')
 def edit_expense(request, expense_id):
     expense = get_object_or_404(Expense, id=expense_id, daily_ledger__user=request.user)
@@ -431,10 +685,11 @@ def edit_expense(request, expense_id):
                     messages.error(request, "Edited amount exceeds remaining budget. Reduce the amount or add budget.")
                 else:
                     expense.price = new_price
-                    expense.save()
+                    with transaction.atomic():
+                        expense.save()
+                        # Re-propagate from edited day with forced carryover
+                        propagate_carryover(request.user, ledger_date, preserve_manual_increases=False)
                     messages.success(request, "Expense updated.")
-                    # Re-propagate from edited day with forced carryover
-                    propagate_carryover(request.user, ledger_date, preserve_manual_increases=False)
         except (ValueError, TypeError):
             pass
     return redirect('daily_view_date', year=ledger_date.year, month=ledger_date.month, day=ledger_date.day)
@@ -445,10 +700,14 @@ def delete_expense(request, expense_id):
     expense = get_object_or_404(Expense, id=expense_id, daily_ledger__user=request.user)
     ledger_date = expense.daily_ledger.date
     if request.method == 'POST':
-        expense.delete()
+        with transaction.atomic():
+            expense.delete()
+            # A day left without expenses goes back to its carry, which the
+            # walk stopped short of while the day was busy.
+            heal_day(request.user, DailyLedger.objects.get(pk=expense.daily_ledger_id))
+            # Re-propagate from deletion day with forced carryover
+            propagate_carryover(request.user, ledger_date, preserve_manual_increases=False)
         messages.success(request, "Expense removed.")
-        # Re-propagate from deletion day with forced carryover
-        propagate_carryover(request.user, ledger_date, preserve_manual_increases=False)
     return redirect('daily_view_date', year=ledger_date.year, month=ledger_date.month, day=ledger_date.day)
 
 def register(request):